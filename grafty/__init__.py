@@ -2,12 +2,19 @@
 grafty — Token-optimized structural editing CLI.
 """
 
-__version__ = "0.1.0"
+__version__ = "0.3.0"
 
-from .models import Node, SelectorResult, FileIndex, PatchOperation
-from .indexer import Indexer
-from .selectors import Resolver
-from .editor import Editor
+# Public names resolve lazily (PEP 562), so `import grafty` does not load
+# the tree-sitter parsers until Indexer is actually used
+_EXPORTS = {
+    "Node": ".models",
+    "SelectorResult": ".models",
+    "FileIndex": ".models",
+    "PatchOperation": ".models",
+    "Indexer": ".indexer",
+    "Resolver": ".selectors",
+    "Editor": ".editor",
+}
 
 __all__ = [
     "Node",
@@ -18,3 +25,18 @@ __all__ = [
     "Resolver",
     "Editor",
 ]
+
+
+def __getattr__(name: str):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,20 +1,74 @@
 """
 cli.py - Command-line interface for grafty.
 """
+import functools
+import itertools
+import os
+import re
+import shlex
+import shutil
 import sys
-import json
 from pathlib import Path
-from typing import Optional, List
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
 
 import click
 
-from .indexer import Indexer
-from .selectors import Resolver
-from .editor import Editor
-from .models import Node
-from .patch import git_apply_check, format_patch_summary
-from .utils import truncate_text
-from .multi_file_patch import PatchSet
+from ._json import dumps as _dumps
+from .index_cache import FileIndexCache
+from .models import FileIndex, Node, SelectorResult
+from .utils import truncate_text, write_bytes_atomic
+
+# Parsers, the resolver, editor and patch machinery are imported inside the
+# commands that use them, so `grafty --help` and light commands start fast
+if TYPE_CHECKING:
+    from .indexer import Indexer
+
+# Maximum number of rows shown by `search` without --json
+SEARCH_DISPLAY_LIMIT = 20
+
+# Kinds whose qualname is exactly the dotted parent chain of names, so their
+# nested path can be taken from it without walking parents
+_QUALNAME_PATH_KINDS = frozenset({"py_class", "py_function", "py_method"})
+
+# Bare node ids as produced by Node.compute_id
+_NODE_ID_RE = re.compile(r"^[0-9a-f]{16}$")
+
+
+@functools.cache
+def _indexer() -> "Indexer":
+    """
+    Process-wide Indexer, created (and its parsers imported) on first use.
+
+    Its cache is the on-disk index cache, or a memory-only one if
+    $GRAFTY_NO_CACHE is set; either way, repeated commands in one process
+    (e.g. a repl session) only re-parse files whose mtime or size changed.
+    """
+    from .indexer import Indexer
+
+    return Indexer(cache=FileIndexCache.from_env() or FileIndexCache(persistent=False))
+
+
+@functools.cache
+def _directory_indices(cwd: str, repo_root: str, jobs: Optional[int]) -> Dict[str, FileIndex]:
+    """index_directory(repo_root) as seen from cwd, memoized (see _get_indices)."""
+    return _indexer().index_directory(repo_root, jobs=jobs)
+
+
+def _get_indices(repo_root: str, jobs: Optional[int] = None) -> Dict[str, FileIndex]:
+    """
+    Indices of every file under repo_root, walked at most once per process.
+
+    Commands that write files call _invalidate_indices afterwards, and the
+    repl does so before each command so external edits are picked up.
+    """
+    # Node paths are built from repo_root as given, so relative roots also
+    # depend on the working directory
+    return _directory_indices(os.getcwd(), repo_root, jobs)
+
+
+def _invalidate_indices() -> None:
+    """Forget memoized directory indices after files were changed."""
+    _directory_indices.cache_clear()
 
 
 def _extract_file_from_selector(
@@ -37,24 +91,102 @@ def _extract_file_from_selector(
     return None
 
 
+def _index_key(file_path: Path, repo_root: str) -> str:
+    """Return the path string index_directory(repo_root) would use for file_path."""
+    root = Path(repo_root)
+    try:
+        relative = file_path.resolve().relative_to(root.resolve())
+    except ValueError:
+        # Outside repo_root; a directory scan would never see it
+        return str(file_path.resolve())
+    return str(root / relative)
+
+
+def _lookup_cached_id(selector: str, repo_root: str) -> Optional[Node]:
+    """
+    Resolve a bare node id from the on-disk cache without parsing anything.
+
+    Returns None on a cache miss, if the owning file changed, or if the node
+    lies outside what index_directory(repo_root) would have indexed.
+    """
+    if not _NODE_ID_RE.match(selector):
+        return None
+    cache = FileIndexCache.from_env()
+    if cache is None:
+        return None
+    node = cache.lookup_id(selector)
+    if node is None or _index_key(Path(node.path), repo_root) != node.path:
+        return None
+    return node
+
+
+def _maybe_extract_path(selector: str) -> Optional[Path]:
+    """Return the file named by a path-prefixed selector (path:...), if it exists."""
+    if ":" not in selector:
+        return None
+    candidate = Path(selector.split(":", 1)[0]).expanduser()
+    return candidate if candidate.is_file() else None
+
+
+def _resolve_selector_minimal(
+    selector: str, repo_root: str = "."
+) -> Tuple[Dict[str, FileIndex], SelectorResult]:
+    """
+    Resolve a selector, parsing as little of the repository as possible.
+
+    If the selector starts with a path to an existing file (path:kind:name,
+    path:line, path:start-end), only that file is indexed. So is the owning
+    file of a node id found in the on-disk cache. Other ID and fuzzy
+    selectors fall back to indexing all of repo_root.
+
+    Returns (indices, result).
+    """
+    from .selectors import Resolver
+
+    indexer = _indexer()
+
+    cached_node = _lookup_cached_id(selector, repo_root)
+    if cached_node is not None:
+        indices = {cached_node.path: indexer.index_file(cached_node.path, keep_source=True)}
+        result = Resolver(indices).resolve(selector)
+        if result.is_resolved():
+            return indices, result
+
+    candidate = _maybe_extract_path(selector)
+    if candidate is not None:
+        key = _index_key(candidate, repo_root)
+        indices = {key: indexer.index_file(key, keep_source=True)}
+        return indices, Resolver(indices).resolve(selector)
+
+    indices = _get_indices(repo_root)
+    return indices, Resolver(indices).resolve(selector)
+
+
 def _print_human_readable(indices: dict) -> None:
     """Print index in human-readable format with smart column widths."""
-    for file_path, idx in sorted(indices.items()):
-        # Build nodes_by_id lookup for this file
-        nodes_by_id = {node.id: node for node in idx.nodes}
+    out: List[str] = []
+
+    for file_path in sorted(indices):
+        idx = indices[file_path]
+        nested_paths = _compute_nested_paths(idx)
 
-        # First pass: calculate max column widths
+        # Single pass: format rows and track max column widths
         max_kind = len("KIND")
         max_name = len("NODE NAME")
         max_lines = len("LINES")
+        rows = []
 
         for node in idx.nodes:
-            nested_path = _compute_nested_path(node, nodes_by_id)
-            max_kind = max(max_kind, len(node.kind))
-            max_name = max(max_name, len(nested_path))
+            nested_path = nested_paths[node.id]
             # Line range format: "4-180" (no padding)
             lines_str = f"{node.start_line}-{node.end_line}"
-            max_lines = max(max_lines, len(lines_str))
+            rows.append((node.kind, nested_path, lines_str))
+            if len(node.kind) > max_kind:
+                max_kind = len(node.kind)
+            if len(nested_path) > max_name:
+                max_name = len(nested_path)
+            if len(lines_str) > max_lines:
+                max_lines = len(lines_str)
 
         # Add padding
         max_kind += 1
@@ -64,27 +196,40 @@ def _print_human_readable(indices: dict) -> None:
         # Calculate total width
         total_width = max_kind + max_name + max_lines + 6  # 6 = 2 " │ " + " │ "
 
+        # Fixed-width templates built once per file instead of per row
+        rule = "═" * total_width
+        row_fmt = "{:<%d}│ {:<%d}│ {:>%d}" % (max_kind, max_name, max_lines)
+
         # Header
-        click.echo(f"\n{'═' * total_width}")
-        click.echo(f"FILE: {file_path} ({len(idx.nodes)} nodes)")
-        click.echo(f"{'═' * total_width}")
+        out.append("\n" + rule)
+        out.append(f"FILE: {file_path} ({len(idx.nodes)} nodes)")
+        out.append(rule)
 
         # Column headers
-        click.echo(
-            f"{'KIND':<{max_kind}}│ {'NODE NAME':<{max_name}}│ {'LINES':>{max_lines}}"
-        )
+        out.append(row_fmt.format("KIND", "NODE NAME", "LINES"))
         # Separator (all dashes, matching column widths exactly)
-        sep_line = f"{'-' * max_kind}┼─{'-' * max_name}┼─{'-' * max_lines}"
-        click.echo(sep_line)
-
-        # Data rows (no indentation, paths already show hierarchy with /)
-        for node in idx.nodes:
-            nested_path = _compute_nested_path(node, nodes_by_id)
-            lines_str = f"{node.start_line}-{node.end_line}"
+        out.append(f"{'-' * max_kind}┼─{'-' * max_name}┼─{'-' * max_lines}")
+
+        # Data rows (no indentation, paths already show hierarchy with /);
+        # same text as row_fmt, but ljust/rjust skip the format-spec parsing
+        out.extend(
+            "".join((
+                kind.ljust(max_kind), "│ ", name.ljust(max_name), "│ ", lines.rjust(max_lines)
+            ))
+            for kind, name, lines in rows
+        )
 
-            click.echo(
-                f"{node.kind:<{max_kind}}│ {nested_path:<{max_name}}│ {lines_str:>{max_lines}}"
-            )
+    if not out:
+        return
+    text = "\n".join(out)
+    if not sys.stdout.isatty():
+        # Pipes get one raw write, bypassing click's per-call handling
+        sys.stdout.write(text + "\n")
+        sys.stdout.flush()
+    elif len(out) > shutil.get_terminal_size().lines:
+        click.echo_via_pager(text)
+    else:
+        click.echo(text)
 
 
 def _format_toon(indices: dict) -> str:
@@ -97,12 +242,13 @@ def _format_toon(indices: dict) -> str:
     """
     lines = []
 
-    for file_path, idx in sorted(indices.items()):
+    for file_path in sorted(indices):
+        idx = indices[file_path]
         # Top-level object (YAML-style)
         lines.append(f"file: {file_path}")
 
         # Array declaration with field names
-        nodes_by_id = {node.id: node for node in idx.nodes}
+        nested_paths = _compute_nested_paths(idx)
         num_nodes = len(idx.nodes)
 
         # TOON array format: nodes[count]{field,names}:
@@ -110,7 +256,7 @@ def _format_toon(indices: dict) -> str:
 
         # Data rows (CSV-style values)
         for node in idx.nodes:
-            nested_path = _compute_nested_path(node, nodes_by_id)
+            nested_path = nested_paths[node.id]
             line_range = f"{node.start_line}-{node.end_line}"
             # CSV-style: quoted strings if they contain special chars, bare numbers/ranges
             lines.append(
@@ -120,20 +266,92 @@ def _format_toon(indices: dict) -> str:
     return "\n".join(lines)
 
 
-def _compute_nested_path(node: Node, nodes_by_id: dict) -> str:
-    """Compute nested path for a node (e.g., 'Parent/Child/GrandChild')."""
-    parts = [node.name]
-    current = node
+def _compute_nested_paths(idx: FileIndex) -> Dict[str, str]:
+    """Compute nested paths (e.g., 'Parent/Child/GrandChild') for all nodes in a file.
 
-    while current.parent_id:
-        parent = nodes_by_id.get(current.parent_id)
-        if parent:
-            parts.insert(0, parent.name)
+    Paths are memoized by node ID, so each parent edge is walked at most once,
+    and nodes with a qualname-derived path are not walked at all.
+    """
+    nodes_by_id = idx.nodes_by_id
+    paths: Dict[str, str] = {}
+
+    for node in idx.nodes:
+        if node.id in paths:
+            continue
+        if node.qualname and node.kind in _QUALNAME_PATH_KINDS:
+            paths[node.id] = node.qualname.replace(".", "/")
+            continue
+
+        # Walk up until the root or an ancestor whose path is already known
+        chain = [node]
+        prefix = None
+        current = node
+        while current.parent_id:
+            cached = paths.get(current.parent_id)
+            if cached is not None:
+                prefix = cached
+                break
+            parent = nodes_by_id.get(current.parent_id)
+            if not parent:
+                break
+            chain.append(parent)
             current = parent
-        else:
-            break
 
-    return "/".join(parts)
+        # Fill in paths top-down so every node on the chain is cached
+        for chain_node in reversed(chain):
+            prefix = chain_node.name if prefix is None else f"{prefix}/{chain_node.name}"
+            paths[chain_node.id] = prefix
+
+    return paths
+
+
+def _echo_json(obj: Any, pretty: bool = False) -> None:
+    """Write obj as JSON (plus newline) straight to the binary stdout."""
+    click.echo(_dumps(obj, pretty))
+
+
+class _StreamedArray:
+    """Marks an iterable to be written as a JSON array one element at a time."""
+
+    def __init__(self, items: Iterable[Any]):
+        self.items = items
+
+
+def _echo_json_object(items: Iterable[Tuple[str, Any]], pretty: bool = False) -> None:
+    """Stream a JSON object member by member.
+
+    Output matches _dumps(dict(items), pretty), but only one member is
+    serialized at a time, so peak memory is bounded by the largest value.
+    Values wrapped in _StreamedArray are serialized one element at a time.
+    """
+    first = True
+    for key, value in items:
+        if pretty:
+            head = (b"{" if first else b",") + b"\n  " + _dumps(key) + b": "
+        else:
+            head = (b"{" if first else b",") + _dumps(key) + b":"
+        first = False
+
+        if isinstance(value, _StreamedArray):
+            click.echo(head + b"[", nl=False)
+            empty = True
+            for element in value.items:
+                if pretty:
+                    body = _dumps(element, pretty=True).replace(b"\n", b"\n    ")
+                    click.echo((b"\n    " if empty else b",\n    ") + body, nl=False)
+                else:
+                    click.echo((b"" if empty else b",") + _dumps(element), nl=False)
+                empty = False
+            click.echo(b"]" if empty or not pretty else b"\n  ]", nl=False)
+        elif pretty:
+            # Re-indent the nested value one level (encoded strings never contain raw newlines)
+            click.echo(head + _dumps(value, pretty=True).replace(b"\n", b"\n  "), nl=False)
+        else:
+            click.echo(head + _dumps(value), nl=False)
+    if first:
+        click.echo(b"{}")
+    else:
+        click.echo(b"\n}" if pretty else b"}")
 
 
 def _wrap_lines(text: str, width: int = 120) -> str:
@@ -166,27 +384,31 @@ def _wrap_lines(text: str, width: int = 120) -> str:
 
 def _show_node(
     node: Node,
+    file_index: Optional[FileIndex] = None,
     output_json: bool = False,
     wrap: bool = True,
     max_lines: Optional[int] = None,
     max_chars: Optional[int] = None,
+    pretty: bool = False,
 ) -> None:
     """Display a node's content (helper function)."""
-    # Read node content
-    p = Path(node.path)
-    content = p.read_text(encoding="utf-8")
-    lines = content.splitlines()
-
-    start_idx = node.start_line - 1
-    end_idx = node.end_line
-    node_text = "\n".join(lines[start_idx:end_idx])
+    if file_index is not None and file_index.source_lines is not None:
+        # Lines retained during indexing; no second read
+        lines = file_index.source_lines[node.start_line - 1:node.end_line]
+    else:
+        # Read only up to the node's last line, skipping earlier lines in C
+        with Path(node.path).open("r", encoding="utf-8") as f:
+            lines = list(itertools.islice(f, max(node.start_line - 1, 0), max(node.end_line, 0)))
+    node_text = "".join(lines)
+    if node_text.endswith("\n"):
+        node_text = node_text[:-1]
 
     if output_json:
         output = {
             "node": node.to_dict(),
             "text": node_text,
         }
-        click.echo(json.dumps(output, indent=2))
+        _echo_json(output, pretty)
     else:
         # Wrap long lines if enabled (default)
         if wrap:
@@ -201,24 +423,41 @@ def _show_node(
         click.echo("\n" + node_text)
 
 
+def _report_index_errors() -> None:
+    """Print the files the shared Indexer failed to index to stderr, then forget them."""
+    if not _indexer.cache_info().currsize:
+        return  # no command so far needed an index
+    errors = _indexer().errors
+    if errors:
+        click.echo(
+            "\n".join(f"Error indexing {path}: {message}" for path, message in errors),
+            err=True,
+        )
+        errors.clear()
+
+
 @click.group()
 def cli():
     """Token-optimized structural editor for code/text files."""
-    pass
+    # Reported once per command, after its output, even if it exits early
+    click.get_current_context().call_on_close(_report_index_errors)
 
 
 @cli.command()
 @click.argument("paths", nargs=-1, type=str)
 @click.option("--json", "output_json", is_flag=True, help="Output as JSON")
+@click.option("--pretty", is_flag=True, help="Indent JSON output (default: compact)")
 @click.option("--toon", is_flag=True, help="Output as Token Optimized Object Notation (compact)")
-def index(paths: List[str], output_json: bool, toon: bool) -> None:
+@click.option("--jobs", "-j", type=int, default=None,
+              help="Parallel indexing processes (default: CPU count, 1 disables)")
+def index(
+    paths: List[str], output_json: bool, pretty: bool, toon: bool, jobs: Optional[int]
+) -> None:
     """Index files and list all structural units."""
     if not paths:
         paths = ["."]
 
-    indexer = Indexer()
-    indices = {}
-
+    resolved = []
     for path in paths:
         # Expand tilde and resolve to absolute path
         p = Path(path).expanduser().resolve()
@@ -226,16 +465,14 @@ def index(paths: List[str], output_json: bool, toon: bool) -> None:
         if not p.exists():
             click.echo(f"Error: Path does not exist: {path}", err=True)
             sys.exit(1)
+        resolved.append(str(p))
 
-        if p.is_file():
-            indices[str(p)] = indexer.index_file(str(p))
-        else:
-            indices.update(indexer.index_directory(str(p)))
+    # All files from every path are parsed as one batch (one process pool)
+    indices = _indexer().index_paths(resolved, jobs=jobs)
 
     if output_json:
-        # Output JSON
-        output = {path: idx.to_dict() for path, idx in indices.items()}
-        click.echo(json.dumps(output, indent=2))
+        # Stream JSON one file at a time instead of building the whole document
+        _echo_json_object(((path, idx.to_dict()) for path, idx in indices.items()), pretty)
     elif toon:
         # Token Optimized Object Notation (compact JSON-like format)
         output = _format_toon(indices)
@@ -250,10 +487,13 @@ def index(paths: List[str], output_json: bool, toon: bool) -> None:
 @click.option("--path", type=str, help="Limit search to path pattern (e.g., src/)")
 @click.option("--kind", type=str, help="Limit to node kind (e.g., py_function)")
 @click.option("--json", "output_json", is_flag=True, help="Output as JSON")
+@click.option("--pretty", is_flag=True, help="Indent JSON output (default: compact)")
 @click.option("--repo-root", type=click.Path(), default=".", help="Repository root")
+@click.option("--jobs", "-j", type=int, default=None,
+              help="Parallel indexing processes (default: CPU count, 1 disables)")
 def search(
     pattern: str, path: Optional[str], kind: Optional[str],
-    output_json: bool, repo_root: str
+    output_json: bool, pretty: bool, repo_root: str, jobs: Optional[int]
 ) -> None:
     """
     Search nodes by glob pattern (Phase 3.3).
@@ -263,41 +503,51 @@ def search(
     - grafty search "test_*"             # Find all nodes starting with 'test_'
     - grafty search "*_test" --path src/ # Find nodes ending with '_test' in src/
     """
-    indexer = Indexer()
-    indices = indexer.index_directory(repo_root)
+    from .selectors import Resolver
+
+    indices = _get_indices(repo_root, jobs=jobs)
     resolver = Resolver(indices)
 
+    # Only the first rows are displayed, so stop matching early unless JSON is requested
+    limit = None if output_json else SEARCH_DISPLAY_LIMIT + 1
+
     # Build selector for query_nodes_by_path_glob
     if path and kind:
         selector = f"{path}:{kind}:{pattern}"
-        results = resolver.query_nodes_by_path_glob(selector)
+        results = resolver.query_nodes_by_path_glob(selector, limit=limit)
     elif path:
         selector = f"{path}:*:{pattern}"
-        results = resolver.query_nodes_by_path_glob(selector)
-    elif kind:
-        # Query all paths with specific kind
-        results = [n for n in resolver.query_nodes_by_pattern(pattern) if n.kind == kind]
+        results = resolver.query_nodes_by_path_glob(selector, limit=limit)
     else:
-        # Just pattern search
-        results = resolver.query_nodes_by_pattern(pattern)
+        # Name glob compiled once (or bisected for prefixes); kind filters before sorting
+        results = resolver.query_nodes_by_pattern(pattern, limit=limit, kind=kind)
 
     if output_json:
-        output = {
-            "pattern": pattern,
-            "count": len(results),
-            "nodes": [n.to_dict() for n in results],
-        }
-        click.echo(json.dumps(output, indent=2))
+        # Stream nodes one at a time instead of building the whole document
+        _echo_json_object(
+            [
+                ("pattern", pattern),
+                ("count", len(results)),
+                ("nodes", _StreamedArray(n.to_dict() for n in results)),
+            ],
+            pretty,
+        )
     else:
         if not results:
             click.echo(f"No nodes matching pattern: {pattern}")
         else:
-            click.echo(f"Found {len(results)} nodes matching '{pattern}':\n")
-            for node in results[:20]:  # Limit to 20 results
+            truncated = len(results) > SEARCH_DISPLAY_LIMIT
+            # Rows are collected and echoed in one call
+            if truncated:
+                out = [f"Found more than {SEARCH_DISPLAY_LIMIT} nodes matching '{pattern}':\n"]
+            else:
+                out = [f"Found {len(results)} nodes matching '{pattern}':\n"]
+            for node in results[:SEARCH_DISPLAY_LIMIT]:
                 path_spec = f"{node.path}:{node.start_line}-{node.end_line}"
-                click.echo(f"[{node.kind:15}] {node.name:40} {path_spec}")
-            if len(results) > 20:
-                click.echo(f"\n... and {len(results) - 20} more")
+                out.append(f"[{node.kind:15}] {node.name:40} {path_spec}")
+            if truncated:
+                out.append("\n... and more (use --json to list all matches)")
+            click.echo("\n".join(out))
 
 
 @cli.command()
@@ -305,9 +555,13 @@ def search(
 @click.option("--max-lines", type=int, default=None, help="Max lines to show (optional)")
 @click.option("--max-chars", type=int, default=None, help="Max chars to show (optional)")
 @click.option("--json", "output_json", is_flag=True, help="Output as JSON")
+@click.option("--pretty", is_flag=True, help="Indent JSON output (default: compact)")
 @click.option("--nowrap", is_flag=True, help="Disable line wrapping (default: wrap long lines)")
 @click.option("--repo-root", type=click.Path(), default=".", help="Repository root")
-def show(selector: str, max_lines: Optional[int], max_chars: Optional[int], output_json: bool, nowrap: bool, repo_root: str) -> None:
+def show(
+    selector: str, max_lines: Optional[int], max_chars: Optional[int],
+    output_json: bool, pretty: bool, nowrap: bool, repo_root: str
+) -> None:
     """
     Show a node by selector.
 
@@ -323,53 +577,27 @@ def show(selector: str, max_lines: Optional[int], max_chars: Optional[int], outp
     - grafty show "file.py:42-50"       # Line range
     - grafty show "process"             # Fuzzy search
     """
-    from pathlib import Path
-
-    # If selector has path:kind:name format, parse ONLY that file (no directory scan)
+    # A selector that explicitly names a missing file can never resolve
     if ":" in selector and not selector[0].isalnum():
-        parts = selector.split(":", 2)
-        if len(parts) >= 2:
-            maybe_file = parts[0]
-            file_path = Path(maybe_file).expanduser().resolve()
-
-            # If the selector explicitly names a file, index only that file
-            if file_path.is_file():
-                try:
-                    indexer = Indexer()
-                    file_index = indexer.index_file(str(file_path))
-                    indices = {str(file_path): file_index}
-
-                    resolver = Resolver(indices)
-                    result = resolver.resolve(selector)
-
-                    if result.is_resolved():
-                        node = result.exact_match
-                        assert node is not None
-
-                        # Show node content
-                        _show_node(node, output_json, wrap=not nowrap, max_lines=max_lines, max_chars=max_chars)
-                        return
-
-                    # File was found but selector didn't resolve—error, don't fall back
-                    click.echo(f"Error: Selector not found in {file_path}", err=True)
-                    click.echo(f"\nTip: Use 'grafty index {file_path}' to see available nodes.", err=True)
-                    sys.exit(1)
-                except Exception as e:
-                    # File was found but parsing failed—error, don't fall back
-                    click.echo(f"Error parsing {file_path}: {e}", err=True)
-                    sys.exit(1)
-            else:
-                # File was not found
-                click.echo(f"Error: File not found: {file_path}", err=True)
-                sys.exit(1)
+        file_path = Path(selector.split(":", 1)[0]).expanduser().resolve()
+        if not file_path.is_file():
+            click.echo(f"Error: File not found: {file_path}", err=True)
+            sys.exit(1)
 
-    # Fallback (only for fuzzy selectors without a filename): scan repo_root
-    indexer = Indexer()
-    indices = indexer.index_directory(repo_root)
+    cached_node = _lookup_cached_id(selector, repo_root)
+    if cached_node is not None:
+        _show_node(
+            cached_node,
+            None,
+            output_json,
+            wrap=not nowrap,
+            max_lines=max_lines,
+            max_chars=max_chars,
+            pretty=pretty,
+        )
+        return
 
-    # Resolve selector
-    resolver = Resolver(indices)
-    result = resolver.resolve(selector)
+    indices, result = _resolve_selector_minimal(selector, repo_root)
 
     if not result.is_resolved():
         if result.candidates:
@@ -391,7 +619,15 @@ def show(selector: str, max_lines: Optional[int], max_chars: Optional[int], outp
     node = result.exact_match
     assert node is not None
 
-    _show_node(node, output_json, wrap=not nowrap, max_lines=max_lines, max_chars=max_chars)
+    _show_node(
+        node,
+        indices.get(node.path),
+        output_json,
+        wrap=not nowrap,
+        max_lines=max_lines,
+        max_chars=max_chars,
+        pretty=pretty,
+    )
 
 
 @cli.command()
@@ -436,6 +672,8 @@ def replace(
     - --force: Skip drift detection
     - --patch-out: Save patch to file
     """
+    from .editor import Editor
+
     if not text and not file:
         click.echo("Error: Must provide --text or --file", err=True)
         sys.exit(1)
@@ -446,13 +684,8 @@ def replace(
 
     replacement_text = text or Path(file).read_text(encoding="utf-8")
 
-    # Index and resolve
-    indexer = Indexer()
-    indices = indexer.index_directory(repo_root)
-    resolver = Resolver(indices)
-
-    # Try to resolve selector - might be line number format
-    result = resolver.resolve(selector)
+    # Index and resolve - might be line number format
+    indices, result = _resolve_selector_minimal(selector, repo_root)
 
     if not result.is_resolved():
         # Improved error message (Phase 3)
@@ -485,12 +718,13 @@ def replace(
 
     # Write patch file if requested
     if patch_out:
-        Path(patch_out).write_text(patch)
+        write_bytes_atomic(patch_out, patch.encode("utf-8"))
         click.echo(f"Patch written to {patch_out}")
 
     # Apply if not dry-run
     if not dry_run and apply:
         editor.write(force=force, backup=backup)
+        _invalidate_indices()
         click.echo(f"Applied changes to {node.path}")
 
 
@@ -545,6 +779,9 @@ def insert(
     - --file: Read text from file
     - --apply: Apply changes (default: dry-run shows patch)
     """
+    from .editor import Editor
+    from .selectors import Resolver
+
     if not text and not file:
         click.echo("Error: Must provide --text or --file", err=True)
         sys.exit(1)
@@ -578,7 +815,7 @@ def insert(
             click.echo(f"Error: File '{selector}' not found", err=True)
             sys.exit(1)
 
-        indexer = Indexer()
+        indexer = _indexer()
         file_index = indexer.index_file(file_path)
         editor = Editor(file_index)
         editor.insert(text=insert_text, line=line)
@@ -607,14 +844,18 @@ def insert(
         else:
             position = "inside-end"
 
-        # Extract file path from selector (path:kind:name format)
-        selector_file = _extract_file_from_selector(selector, repo_root)
+        # Extract file path from selector (path:kind:name format); the cheap
+        # cwd-relative check runs first, then the repo_root-relative fallback
+        candidate = _maybe_extract_path(selector)
+        if candidate is not None:
+            selector_file: Optional[str] = str(candidate.resolve())
+        else:
+            selector_file = _extract_file_from_selector(selector, repo_root)
 
-        indexer = Indexer()
         if selector_file and Path(selector_file).exists():
-            indices = indexer.index_files([selector_file])
+            indices = _indexer().index_files([selector_file])
         else:
-            indices = indexer.index_directory(repo_root)
+            indices = _get_indices(repo_root)
 
         resolver = Resolver(indices)
         result = resolver.resolve(selector)
@@ -644,11 +885,12 @@ def insert(
     click.echo(patch)
 
     if patch_out:
-        Path(patch_out).write_text(patch)
+        write_bytes_atomic(patch_out, patch.encode("utf-8"))
         click.echo(f"Patch written to {patch_out}")
 
     if not dry_run and apply:
         editor.write(force=force, backup=backup)
+        _invalidate_indices()
         click.echo("Applied insertion")
 
 
@@ -687,11 +929,10 @@ def delete(
     - --backup: Create .bak backup before applying
     - --patch-out: Save patch to file
     """
+    from .editor import Editor
+
     # Index and resolve
-    indexer = Indexer()
-    indices = indexer.index_directory(repo_root)
-    resolver = Resolver(indices)
-    result = resolver.resolve(selector)
+    indices, result = _resolve_selector_minimal(selector, repo_root)
 
     if not result.is_resolved():
         click.echo(f"Error: {result.error or 'Ambiguous selector'}", err=True)
@@ -711,12 +952,13 @@ def delete(
 
     # Write patch file if requested
     if patch_out:
-        Path(patch_out).write_text(patch)
+        write_bytes_atomic(patch_out, patch.encode("utf-8"))
         click.echo(f"Patch written to {patch_out}")
 
     # Apply if not dry-run
     if not dry_run and apply:
         editor.write(force=force, backup=backup)
+        _invalidate_indices()
         click.echo(f"Deleted from {node.path}")
 
 
@@ -725,13 +967,15 @@ def delete(
 @click.option("--repo-root", type=click.Path(), default=".", help="Repository root")
 def check(patch_file: str, repo_root: str) -> None:
     """Validate patch applicability."""
-    patch_content = Path(patch_file).read_text(encoding="utf-8")
+    from .patch import git_apply_check, format_patch_summary, parse_patch
 
-    success, output = git_apply_check(patch_content, repo_root)
+    parsed = parse_patch(Path(patch_file).read_text(encoding="utf-8"))
+
+    success, output = git_apply_check(parsed, repo_root)
 
     if success:
         click.echo("✓ Patch is valid")
-        click.echo(format_patch_summary(patch_content))
+        click.echo(format_patch_summary(parsed))
     else:
         click.echo("✗ Patch validation failed:", err=True)
         click.echo(output, err=True)
@@ -815,18 +1059,18 @@ def apply_patch(
     - grafty apply-patch patch.txt --apply --auto-commit --auto-push  # Apply + commit + push
     - grafty apply-patch patch.txt --apply --auto-commit -m "Update API"  # Custom message
     """
+    from .multi_file_patch import PatchSet
     from .vcs import GitRepo, GitConfig, NotAGitRepo, DirtyRepo
 
     patch_set = PatchSet()
 
     # Load patch file
-    patch_content = Path(patch_file).read_text(encoding="utf-8")
-
     try:
         if format == "json":
-            patch_set.load_from_json(patch_content)
+            # Parsed straight from the UTF-8 bytes
+            patch_set.load_from_json(Path(patch_file).read_bytes())
         else:  # simple format
-            patch_set.load_from_simple_format(patch_content)
+            patch_set.load_from_simple_format(Path(patch_file).read_text(encoding="utf-8"))
     except ValueError as e:
         click.echo(f"Error parsing patch file: {e}", err=True)
         sys.exit(1)
@@ -835,28 +1079,19 @@ def apply_patch(
         click.echo("Error: No mutations found in patch file", err=True)
         sys.exit(1)
 
-    # Always validate first
-    validation = patch_set.validate_all(repo_root)
-    if not validation.success:
-        click.echo(str(validation), err=True)
-        sys.exit(1)
-
-    # Generate and show diffs (dry-run)
+    # Validate and generate diffs (dry-run) in one pass; generate_diffs
+    # returns the validation result itself when validation fails
     diffs = patch_set.generate_diffs(repo_root)
     if not diffs.success:
         click.echo(str(diffs), err=True)
         sys.exit(1)
 
-    # Show diffs
-    click.echo("=" * 70)
-    click.echo(f"Multi-file patch preview ({len(diffs.diffs)} file(s))")
-    click.echo("=" * 70)
-    for file_path, diff in sorted(diffs.diffs.items()):
-        click.echo(diff)
-
-    click.echo("=" * 70)
-    click.echo(str(diffs))
-    click.echo("=" * 70)
+    # Show the whole preview with a single write
+    rule = "=" * 70
+    preview = [rule, f"Multi-file patch preview ({len(diffs.diffs)} file(s))", rule]
+    preview.extend(diffs.diffs[file_path] for file_path in sorted(diffs.diffs))
+    preview.extend([rule, str(diffs), rule])
+    click.echo("\n".join(preview))
 
     # Apply if flag is set
     if apply:
@@ -885,6 +1120,7 @@ def apply_patch(
             force=force,
             git_config=git_config,
         )
+        _invalidate_indices()
 
         if result.success:
             click.echo("\n✓ Patch applied successfully")
@@ -897,6 +1133,55 @@ def apply_patch(
         click.echo("\n(Use --apply to apply changes)")
 
 
+@cli.command()
+@click.option("--repo-root", type=click.Path(), default=".", help="Repository root to pre-index")
+def repl(repo_root: str) -> None:
+    """
+    Run grafty commands interactively, keeping parsed indices in memory.
+
+    Each line is parsed like a command line (e.g. `show src/a.py:42`).
+    Files are re-parsed only when their mtime or size changes, so edits
+    applied from the session are picked up automatically. Exit with
+    `quit`, `exit` or EOF.
+    """
+    _get_indices(repo_root)
+    while True:
+        try:
+            line = input("grafty> ")
+        except EOFError:
+            click.echo()
+            break
+        except KeyboardInterrupt:
+            click.echo()
+            continue
+
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            continue
+        if not args:
+            continue
+        if args[0] in ("quit", "exit"):
+            break
+        if args[0] == "repl":
+            click.echo("Error: already in a repl session", err=True)
+            continue
+
+        # Files may have changed since the last command; the walk is redone,
+        # but unchanged files are still served from the indexer's cache
+        _invalidate_indices()
+        try:
+            cli.main(args, prog_name="grafty", standalone_mode=False)
+        except click.exceptions.Abort:
+            click.echo("Aborted!", err=True)
+        except click.ClickException as e:
+            e.show()
+        except SystemExit:
+            # Commands report failures via sys.exit; keep the session alive
+            pass
+
+
 def main() -> None:
     """Entry point."""
     cli()
@@ -1,48 +1,114 @@
 """
 editor.py — File mutation operations (replace, insert, delete).
 """
-from typing import Optional
+import os
+import sys
+from typing import Callable, Dict, Iterator, List, Optional
 
 from .models import Node, FileIndex
 from .patch import (
-    apply_patch_to_buffer,
+    apply_operations_to_lines,
     generate_unified_diff,
-    normalize_newlines,
-    read_file_with_hash,
+    iter_unified_diff,
+    file_stamp,
+    read_file_with_stat,
     write_atomic,
     validate_drift,
 )
 
 
+# Line to insert at (before) for each insert position relative to a node
+_POSITION_HANDLERS: Dict[str, Callable[[Node], int]] = {
+    "before": lambda node: node.start_line,
+    "after": lambda node: node.end_line + 1,
+    "inside-start": lambda node: node.start_line + 1,
+    "inside-end": lambda node: node.end_line,
+}
+
+
 class Editor:
-    """Handle file mutations (replace, insert, delete)."""
+    """
+    Handle file mutations (replace, insert, delete).
+
+    Mutations are queued and applied together, bottom-up, the next time the
+    content is needed (current_content, generate_patch, write). Line numbers
+    therefore always refer to the file as read, like the indexed nodes.
+    """
 
     def __init__(self, file_index: FileIndex):
-        """Initialize with file index."""
+        """
+        Initialize with file index.
+
+        If the index kept its source lines and the file's stamp (mtime in ns
+        and size) is unchanged since they were read, that content is reused
+        instead of re-reading and re-hashing the file; write() still checks
+        for drift either way.
+        """
         self.file_index = file_index
-        self.file_path = file_index.path
-        self.original_content, self.content_hash, self.mtime = read_file_with_hash(
-            self.file_path
-        )
-        self.normalized_content, self.newline_mode = normalize_newlines(
-            self.original_content
-        )
-        self.current_content = self.normalized_content
+        # Node paths are interned, so _check_owner compares identical objects
+        self.file_path = sys.intern(file_index.path)
+        if file_index.source_lines is not None and self._index_is_current():
+            self.original_content = "".join(file_index.source_lines)
+            self.content_hash = file_index.content_hash
+            self.mtime = file_index.mtime
+            # (st_mtime_ns, st_size) when the content was read
+            self.stamp = file_index.stamp
+        else:
+            self.original_content, self.content_hash, st = read_file_with_stat(self.file_path)
+            self.mtime = st.st_mtime
+            self.stamp = file_stamp(st)
+        # Both sources above decode with universal newlines, translating CRLF
+        # and CR while the bytes are hashed, so there is nothing left for
+        # normalize_newlines to find; skip its extra pass over the content
+        self.normalized_content, self.newline_mode = self.original_content, "lf"
+        # Every mutation so far; _content is valid unless _dirty
+        self._ops: List[dict] = []
+        self._content = self.normalized_content
+        self._dirty = False
+        # normalized_content split into lines, on first materialization
+        self._lines: Optional[List[str]] = None
+
+    @property
+    def current_content(self) -> str:
+        """Content with all mutations so far applied."""
+        if self._dirty:
+            if self._lines is None:
+                self._lines = self.normalized_content.splitlines(keepends=True)
+            # Copying the list copies line references, not text
+            lines = self._lines.copy()
+            apply_operations_to_lines(lines, self._ops)
+            self._content = "".join(lines)
+            self._dirty = False
+        return self._content
+
+    def _index_is_current(self) -> bool:
+        """True if the file still has the stamp its indexed source lines were read with."""
+        if self.file_index.stamp is None:
+            return False
+        try:
+            return file_stamp(os.stat(self.file_path)) == self.file_index.stamp
+        except OSError:
+            return False
+
+    def _check_owner(self, node: Node) -> None:
+        """Raise ValueError unless node belongs to this file."""
+        # Interned paths make the identity test the common, O(1) case; the
+        # equality test covers paths built without interning
+        if node.path is not self.file_path and node.path != self.file_path:
+            raise ValueError(
+                f"Node {node.id} belongs to {node.path}, not {self.file_path}"
+            )
 
     def replace(
         self,
         node: Node,
         text: str,
-    ) -> str:
+    ) -> None:
         """
         Replace node with text.
-        Returns modified content (doesn't write to disk).
+        Queues the edit; nothing is written to disk until write().
         """
-        # Validate node belongs to this file
-        if node.path != self.file_path:
-            raise ValueError(
-                f"Node {node.id} belongs to {node.path}, not {self.file_path}"
-            )
+        self._check_owner(node)
 
         # Apply operation
         operation = {
@@ -52,8 +118,7 @@ class Editor:
             "text": text,
         }
 
-        self.current_content = apply_patch_to_buffer(self.current_content, operation)
-        return self.current_content
+        self._queue(operation)
 
     def insert(
         self,
@@ -61,10 +126,10 @@ class Editor:
         line: Optional[int] = None,
         node: Optional[Node] = None,
         position: str = "after",  # before, after, inside-start, inside-end
-    ) -> str:
+    ) -> None:
         """
         Insert text at line or relative to node.
-        Returns modified content.
+        Queues the edit (see replace).
         """
         if line is not None:
             # Insert at absolute line
@@ -75,22 +140,13 @@ class Editor:
                 "text": text,
             }
         elif node is not None:
-            if node.path != self.file_path:
-                raise ValueError(
-                    f"Node {node.id} belongs to {node.path}, not {self.file_path}"
-                )
+            self._check_owner(node)
 
             # Insert relative to node
-            if position == "before":
-                insert_line = node.start_line
-            elif position == "after":
-                insert_line = node.end_line + 1
-            elif position == "inside-start":
-                insert_line = node.start_line + 1
-            elif position == "inside-end":
-                insert_line = node.end_line
-            else:
+            line_for = _POSITION_HANDLERS.get(position)
+            if line_for is None:
                 raise ValueError(f"Unknown position: {position}")
+            insert_line = line_for(node)
 
             operation = {
                 "kind": "insert",
@@ -101,18 +157,14 @@ class Editor:
         else:
             raise ValueError("Must provide either line or node")
 
-        self.current_content = apply_patch_to_buffer(self.current_content, operation)
-        return self.current_content
+        self._queue(operation)
 
-    def delete(self, node: Node) -> str:
+    def delete(self, node: Node) -> None:
         """
         Delete node.
-        Returns modified content.
+        Queues the edit (see replace).
         """
-        if node.path != self.file_path:
-            raise ValueError(
-                f"Node {node.id} belongs to {node.path}, not {self.file_path}"
-            )
+        self._check_owner(node)
 
         operation = {
             "kind": "delete",
@@ -121,8 +173,12 @@ class Editor:
             "text": "",
         }
 
-        self.current_content = apply_patch_to_buffer(self.current_content, operation)
-        return self.current_content
+        self._queue(operation)
+
+    def _queue(self, operation: dict) -> None:
+        """Queue an operation for the next materialization."""
+        self._ops.append(operation)
+        self._dirty = True
 
     def generate_patch(self) -> str:
         """Generate unified diff patch."""
@@ -132,16 +188,28 @@ class Editor:
             self.file_path,
         )
 
+    def iter_patch(self) -> Iterator[str]:
+        """Yield the generate_patch text in pieces, e.g. for file.writelines."""
+        return iter_unified_diff(
+            self.original_content,
+            self.current_content,
+            self.file_path,
+        )
+
     def reset(self) -> None:
         """Reset to original content."""
-        self.current_content = self.normalized_content
+        self._ops = []
+        self._content = self.normalized_content
+        self._dirty = False
 
     def write(self, force: bool = False, backup: bool = False) -> None:
         """
         Write modified content to disk.
         Validates file drift unless force=True.
         """
-        validate_drift(self.file_path, self.content_hash, force=force)
+        validate_drift(
+            self.file_path, self.content_hash, force=force, expected_stamp=self.stamp
+        )
 
         write_atomic(
             self.file_path,
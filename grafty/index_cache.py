@@ -0,0 +1,321 @@
+"""
+index_cache.py — On-disk cache of parsed file indices.
+
+Entries are keyed by file path and validated against (st_mtime_ns, st_size),
+so unchanged files skip reading and parsing entirely on later invocations.
+"""
+import functools
+import os
+import re
+import sys
+from hashlib import sha256
+from typing import Dict, List, Optional
+
+from . import __version__
+from ._json import dumps, loads
+from .models import FileIndex, Node
+
+# Bump when the cached entry layout changes, or when any parser's output
+# changes without a release (released versions are checked separately, see
+# _code_version)
+CACHE_VERSION = 3
+
+# Leading node id characters selecting its id map shard (256 shards for hex ids)
+ID_SHARD_PREFIX = 2
+
+# Installed package metadata directories whose names go into _code_version
+_METADATA_DIR_RE = re.compile(r"^(grafty|tree_sitter\w*)-[^/]*\.(dist|egg)-info$", re.IGNORECASE)
+
+# Environment variable overriding the cache location
+CACHE_DIR_ENV_VAR = "GRAFTY_CACHE_DIR"
+
+# Environment variable disabling the cache when set to a non-empty value
+NO_CACHE_ENV_VAR = "GRAFTY_NO_CACHE"
+
+
+def default_cache_root() -> str:
+    """Cache root: $GRAFTY_CACHE_DIR, else $XDG_CACHE_HOME/grafty (~/.cache/grafty)."""
+    env = os.environ.get(CACHE_DIR_ENV_VAR)
+    if env:
+        return env
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "grafty")
+
+
+def _short_hash(text: str) -> str:
+    return sha256(text.encode()).hexdigest()[:16]
+
+
+@functools.cache
+def _code_version() -> str:
+    """
+    Fingerprint of the code that produced an index: grafty's version plus
+    the installed grafty and Tree-sitter packages, so upgrading either one
+    invalidates every entry.
+
+    Metadata directory names carry the versions (e.g.
+    tree_sitter_python-0.25.0.dist-info); listing sys.path is far cheaper
+    than importing importlib.metadata on every run.
+    """
+    names = []
+    for entry in sys.path:
+        try:
+            listing = os.listdir(entry or ".")
+        except OSError:
+            continue
+        names.extend(name for name in listing if _METADATA_DIR_RE.match(name))
+    return _short_hash("\n".join([__version__, *sorted(names)]))
+
+
+class FileIndexCache:
+    """
+    Persistent FileIndex store, one JSON file per indexed path.
+
+    Entries live under <root>/<repo-hash>/<path-hash>.json, where the repo
+    hash is taken from the working directory so relative paths stay
+    unambiguous. An id map, sharded by id prefix (ids-<xx>.json), maps node
+    ids to paths so ID selectors can be resolved without parsing (see
+    lookup_id), and a per-directory
+    manifest (dir-<root-hash>.json) holds every entry of an indexed tree so
+    a warm index_directory reads one file instead of one per path. A stale, corrupt or
+    unreadable entry is treated as a miss; write failures are ignored so a
+    read-only cache never breaks indexing. With persistent=False only the
+    in-memory layer is used.
+    """
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        repo_root: Optional[str] = None,
+        persistent: bool = True,
+    ):
+        self.persistent = persistent
+        root = root or default_cache_root()
+        repo_root = os.path.abspath(repo_root or os.getcwd())
+        self.cache_dir = os.path.join(root, _short_hash(repo_root))
+        self._memory: Dict[str, FileIndex] = {}
+        self._stamps: Dict[str, tuple] = {}
+        self._pending_ids: Dict[str, List[str]] = {}
+        # root -> {path: [mtime_ns, size, FileIndex dict]} for loaded manifests,
+        # plus the same entries merged across roots for lookups by path
+        self._manifests: Dict[str, Dict[str, list]] = {}
+        self._manifest: Dict[str, list] = {}
+
+    @classmethod
+    def from_env(cls) -> Optional["FileIndexCache"]:
+        """Default cache, or None if disabled via $GRAFTY_NO_CACHE."""
+        if os.environ.get(NO_CACHE_ENV_VAR):
+            return None
+        return cls()
+
+    def _entry_path(self, file_path: str) -> str:
+        return os.path.join(self.cache_dir, _short_hash(file_path) + ".json")
+
+    def _manifest_path(self, root: str) -> str:
+        return os.path.join(self.cache_dir, "dir-" + _short_hash(root) + ".json")
+
+    @staticmethod
+    def _stamp(st: os.stat_result) -> tuple:
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, file_path: str, st: os.stat_result) -> Optional[FileIndex]:
+        """Return the cached index for file_path if it matches stat result st."""
+        stamp = self._stamp(st)
+        if self._stamps.get(file_path) == stamp:
+            return self._memory[file_path]
+        if not self.persistent:
+            return None
+
+        listed = self._manifest.get(file_path)
+        if listed is not None and listed[0] == stamp[0] and listed[1] == stamp[1]:
+            try:
+                file_index = FileIndex.from_dict(listed[2])
+            except (KeyError, TypeError):
+                file_index = None
+            if file_index is not None:
+                self._memory[file_path] = file_index
+                self._stamps[file_path] = stamp
+                return file_index
+
+        try:
+            with open(self._entry_path(file_path), "rb") as f:
+                entry = loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+        if (
+            not isinstance(entry, dict)
+            or entry.get("version") != CACHE_VERSION
+            or entry.get("grafty") != _code_version()
+            or entry.get("path") != file_path
+            or entry.get("mtime_ns") != stamp[0]
+            or entry.get("size") != stamp[1]
+        ):
+            return None
+
+        try:
+            file_index = FileIndex.from_dict(entry["index"])
+        except (KeyError, TypeError):
+            return None
+
+        self._memory[file_path] = file_index
+        self._stamps[file_path] = stamp
+        return file_index
+
+    def put(self, file_path: str, st: os.stat_result, file_index: FileIndex) -> None:
+        """
+        Store file_index for file_path.
+
+        st must be taken *before* the file was read, so a concurrent edit
+        leaves a stale stamp behind and forces a reparse next time.
+        """
+        stamp = self._stamp(st)
+        self._memory[file_path] = file_index
+        self._stamps[file_path] = stamp
+        if not self.persistent:
+            return
+        self._pending_ids[file_path] = [node.id for node in file_index.nodes]
+
+        entry = {
+            "version": CACHE_VERSION,
+            "grafty": _code_version(),
+            "path": file_path,
+            "mtime_ns": stamp[0],
+            "size": stamp[1],
+            "index": file_index.to_dict(sparse=True),
+        }
+        self._write_json(self._entry_path(file_path), entry)
+
+    def load_manifest(self, root: str) -> None:
+        """Load the manifest of directory root so get() can serve its entries."""
+        if not self.persistent or root in self._manifests:
+            return
+        self._manifests[root] = {}
+        try:
+            with open(self._manifest_path(root), "rb") as f:
+                data = loads(f.read())
+        except (OSError, ValueError):
+            return
+        if (
+            isinstance(data, dict)
+            and data.get("version") == CACHE_VERSION
+            and data.get("grafty") == _code_version()
+            and data.get("root") == root
+            and isinstance(data.get("files"), dict)
+        ):
+            self._manifests[root] = data["files"]
+            self._manifest.update(data["files"])
+
+    def save_manifest(self, root: str, indices: Dict[str, FileIndex]) -> None:
+        """
+        Rewrite the manifest of directory root to hold exactly indices.
+
+        Deleted files drop out; nothing is written if every path and stamp
+        already matches the loaded manifest.
+        """
+        if not self.persistent:
+            return
+        stamps = {path: self._stamps.get(path) for path in indices}
+        listed = self._manifests.get(root, {})
+        if len(stamps) == len(listed) and all(
+            stamp is not None
+            and path in listed
+            and tuple(listed[path][:2]) == stamp
+            for path, stamp in stamps.items()
+        ):
+            return
+
+        files = {
+            path: [stamp[0], stamp[1], indices[path].to_dict(sparse=True)]
+            for path, stamp in stamps.items()
+            if stamp is not None
+        }
+        self._manifests[root] = files
+        self._manifest.update(files)
+        self._write_json(
+            self._manifest_path(root),
+            {"version": CACHE_VERSION, "grafty": _code_version(), "root": root, "files": files},
+        )
+
+    def flush(self) -> None:
+        """
+        Merge node ids of entries put since the last flush into the id map.
+
+        Only the shards receiving new ids are rewritten. In each of them,
+        the old ids of re-put files and the ids of files that no longer
+        exist are dropped. Stale ids left in other shards are harmless, as
+        lookup_id checks the owning entry before returning a node.
+        """
+        if not self._pending_ids:
+            return
+        by_shard: Dict[str, Dict[str, str]] = {}
+        for path, node_ids in self._pending_ids.items():
+            for node_id in node_ids:
+                by_shard.setdefault(node_id[:ID_SHARD_PREFIX], {})[node_id] = path
+
+        exists: Dict[str, bool] = {}
+        for shard, new_ids in by_shard.items():
+            ids = {}
+            for node_id, path in self._load_ids(shard).items():
+                if path in self._pending_ids:
+                    continue
+                if path not in exists:
+                    exists[path] = os.path.exists(path)
+                if exists[path]:
+                    ids[node_id] = path
+            ids.update(new_ids)
+            self._write_json(
+                self._ids_path(shard),
+                {"version": CACHE_VERSION, "grafty": _code_version(), "ids": ids},
+            )
+        self._pending_ids = {}
+
+    def lookup_id(self, node_id: str) -> Optional[Node]:
+        """
+        Find a node by id using its id map shard and the owning file's cache entry.
+
+        Returns None unless the file is unchanged since it was cached.
+        """
+        path = self._load_ids(node_id[:ID_SHARD_PREFIX]).get(node_id) if self.persistent else None
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        file_index = self.get(path, st)
+        if file_index is None:
+            return None
+        return file_index.nodes_by_id.get(node_id)
+
+    def _ids_path(self, shard: str) -> str:
+        return os.path.join(self.cache_dir, f"ids-{shard}.json")
+
+    def _load_ids(self, shard: str) -> Dict[str, str]:
+        try:
+            with open(self._ids_path(shard), "rb") as f:
+                data = loads(f.read())
+        except (OSError, ValueError):
+            return {}
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != CACHE_VERSION
+            or data.get("grafty") != _code_version()
+            or not isinstance(data.get("ids"), dict)
+        ):
+            return {}
+        return data["ids"]
+
+    def _write_json(self, target: str, data: dict) -> None:
+        """Atomically replace target with data; failures are ignored."""
+        tmp = f"{target}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(dumps(data))
+            os.replace(tmp, target)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
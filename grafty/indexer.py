@@ -1,62 +1,136 @@
 """
 indexer.py — File discovery and indexing.
 """
-from typing import List, Dict, Optional
+import io
+import os
+import sys
+from typing import Any, List, Dict, Optional, Tuple
 
+from .index_cache import FileIndexCache
 from .models import FileIndex
-from .patch import read_file_with_hash
-from .utils import detect_file_type, find_files
-from .parsers import (
-    PythonParser,
-    MarkdownParser,
-    OrgParser,
-    ClojureParser,
-    JavaScriptParser,
-    GoParser,
-    RustParser,
-    HTMLParser,
-    CSSParser,
-    JsonParser,
-    BashParser,
-    JavaParser,
-    TypeScriptParser,
-    CSharpParser,
-    KotlinParser,
-    SwiftParser,
-)
+from .patch import decode_and_hash, file_stamp, hash_file, read_file_with_stat
+from .utils import detect_file_type, find_files, find_files_with_stat
+from . import parsers
+
+# Parser class (in grafty.parsers) per detected file type, imported and
+# instantiated lazily by Indexer.get_parser
+PARSER_CLASSES: Dict[str, str] = {
+    "python": "PythonParser",
+    "markdown": "MarkdownParser",
+    "orgmode": "OrgParser",
+    "clojure": "ClojureParser",
+    "clojurescript": "ClojureParser",
+    "javascript": "JavaScriptParser",
+    "typescript": "TypeScriptParser",
+    "go": "GoParser",
+    "rust": "RustParser",
+    "html": "HTMLParser",
+    "css": "CSSParser",
+    "json": "JsonParser",
+    "bash": "BashParser",
+    "java": "JavaParser",
+    "csharp": "CSharpParser",
+    "kotlin": "KotlinParser",
+    "swift": "SwiftParser",
+}
+
+# Directories with more files than this are indexed in a process pool
+PARALLEL_THRESHOLD = 32
+
+# Environment variable overriding the default number of indexing processes
+JOBS_ENV_VAR = "GRAFTY_JOBS"
+
+# Per-process indexer used by pool workers (parsers are built once per worker)
+_worker_indexer: Optional["Indexer"] = None
+
+
+def _index_one(path: str) -> Tuple[str, Optional[FileIndex], Optional[str]]:
+    """Index one file in a pool worker. Returns (path, index, error)."""
+    global _worker_indexer
+    if _worker_indexer is None:
+        _worker_indexer = Indexer()
+    try:
+        return path, _worker_indexer.index_file(path), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+def _default_jobs() -> int:
+    """Number of indexing processes: $GRAFTY_JOBS if set, else the CPU count."""
+    env = os.environ.get(JOBS_ENV_VAR)
+    if env and env.isdigit():
+        return max(1, int(env))
+    return os.cpu_count() or 1
 
 
 class Indexer:
     """Multi-file indexer using appropriate parsers."""
 
-    def __init__(self):
-        self.parsers = {
-            "python": PythonParser(),
-            "markdown": MarkdownParser(),
-            "orgmode": OrgParser(),
-            "clojure": ClojureParser(),
-            "clojurescript": ClojureParser(),
-            "javascript": JavaScriptParser(),
-            "typescript": TypeScriptParser(),
-            "go": GoParser(),
-            "rust": RustParser(),
-            "html": HTMLParser(),
-            "css": CSSParser(),
-            "json": JsonParser(),
-            "bash": BashParser(),
-            "java": JavaParser(),
-            "csharp": CSharpParser(),
-            "kotlin": KotlinParser(),
-            "swift": SwiftParser(),
-        }
-
-    def index_file(self, file_path: str) -> FileIndex:
-        """Index a single file."""
+    def __init__(self, cache: Optional[FileIndexCache] = None):
+        self.cache = cache
+        # Parsers built so far, by file type (see get_parser)
+        self.parsers: Dict[str, Any] = {}
+        # (path, message) for every file that failed to index, in order; the
+        # indexer never prints them, so callers decide where they are reported
+        self.errors: List[Tuple[str, str]] = []
+
+    def get_parser(self, file_type: str) -> Optional[Any]:
+        """
+        Parser for file_type, or None if there is none.
+
+        Parsers are imported and constructed on first use, so indexing a
+        Python-only tree never loads the grammars of the other languages.
+        """
+        parser = self.parsers.get(file_type)
+        if parser is None:
+            cls_name = PARSER_CLASSES.get(file_type)
+            if cls_name is None:
+                return None
+            parser = self.parsers[file_type] = getattr(parsers, cls_name)()
+        return parser
+
+    def index_file(self, file_path: str, keep_source: bool = False) -> FileIndex:
+        """
+        Index a single file, reusing the cached index if it is unchanged.
+
+        With keep_source, a freshly parsed index retains the file's lines in
+        FileIndex.source_lines so callers can slice node text without
+        re-reading the file.
+        """
+        file_index = self._index_file_cached(file_path, keep_source)
+        if self.cache is not None:
+            self.cache.flush()
+        return file_index
+
+    def _index_file_cached(self, file_path: str, keep_source: bool = False) -> FileIndex:
+        """index_file without flushing the cache's id map."""
+        if self.cache is None:
+            return self._parse_file(file_path, keep_source)
+
+        # Stat before reading so an edit during parsing invalidates the entry
+        st = os.stat(file_path)
+        file_index = self.cache.get(file_path, st)
+        if file_index is None:
+            file_index = self._parse_file(file_path, keep_source)
+            self.cache.put(file_path, st, file_index)
+        return file_index
+
+    def _parse_file(
+        self, file_path: str, keep_source: bool = False, parsed: Any = None
+    ) -> FileIndex:
+        """
+        Read and parse a single file.
+
+        parsed, if given, is the file's result from _parse_batched: its nodes
+        and source, used instead of reading it again, or the error reading it.
+        """
+        if isinstance(parsed, Exception):
+            raise parsed
         file_type = detect_file_type(file_path)
 
         if not file_type:
             # Unknown type; return empty index
-            content, hash_val, mtime = read_file_with_hash(file_path)
+            hash_val, mtime = hash_file(file_path)
             return FileIndex(
                 path=file_path,
                 content_hash=hash_val,
@@ -64,10 +138,10 @@ class Indexer:
                 nodes=[],
             )
 
-        parser = self.parsers.get(file_type)
+        parser = self.get_parser(file_type)
         if not parser:
             # No parser for this type
-            content, hash_val, mtime = read_file_with_hash(file_path)
+            hash_val, mtime = hash_file(file_path)
             return FileIndex(
                 path=file_path,
                 content_hash=hash_val,
@@ -75,39 +149,245 @@ class Indexer:
                 nodes=[],
             )
 
-        content, hash_val, mtime = read_file_with_hash(file_path)
-
-        # Parse file
-        nodes = parser.parse_file(file_path)
-
-        # Build node lookup
-        nodes_by_id = {node.id: node for node in nodes}
+        if parsed is None:
+            content, hash_val, st = read_file_with_stat(file_path)
+            nodes = parser.parse_file(file_path)
+        else:
+            nodes, (data, st) = parsed
+            # Fails on invalid UTF-8 and hashes just as read_file_with_stat does
+            content, hash_val = decode_and_hash(data)
 
         return FileIndex(
             path=file_path,
             content_hash=hash_val,
-            mtime=mtime,
+            mtime=st.st_mtime,
             nodes=nodes,
-            nodes_by_id=nodes_by_id,
+            # Same line splitting as iterating over the file in text mode
+            source_lines=io.StringIO(content).readlines() if keep_source else None,
+            stamp=file_stamp(st) if keep_source else None,
         )
 
-    def index_files(self, paths: List[str]) -> Dict[str, FileIndex]:
-        """Index multiple files."""
+    def index_files(self, paths: List[str], jobs: Optional[int] = None) -> Dict[str, FileIndex]:
+        """
+        Index multiple files.
+
+        More than PARALLEL_THRESHOLD files are parsed in up to `jobs`
+        processes, as in index_directory.
+        """
+        if jobs is None:
+            jobs = _default_jobs()
+        if jobs > 1 and len(paths) > PARALLEL_THRESHOLD:
+            return self._index_files_parallel(paths, jobs)
+        return self._index_files(paths)
+
+    def _index_files(
+        self, paths: List[str], known_stats: Optional[Dict[str, os.stat_result]] = None
+    ) -> Dict[str, FileIndex]:
+        """index_files, reusing stat results already taken during a directory walk."""
+        cached, stats = self._split_cached(paths, known_stats)
+        parsed = self._parse_batched(list(stats) if self.cache is not None else paths)
         indices: Dict[str, FileIndex] = {}
+        errors: List[Tuple[str, str]] = []
 
         for path in paths:
-            try:
-                indices[path] = self.index_file(path)
-            except Exception as e:
-                print(f"Error indexing {path}: {e}")
+            file_index = cached.get(path)
+            if file_index is None:
+                try:
+                    if self.cache is not None and path not in stats:
+                        # stat failed up front; let the regular path report it
+                        file_index = self._index_file_cached(path)
+                    else:
+                        file_index = self._parse_file(path, parsed=parsed.pop(path, None))
+                        if path in stats:
+                            self.cache.put(path, stats[path], file_index)
+                except Exception as e:
+                    errors.append((path, str(e)))
+                    continue
+            indices[path] = file_index
 
+        if self.cache is not None:
+            self.cache.flush()
+        self.errors.extend(errors)
         return indices
 
+    def _parse_batched(self, paths: List[str]) -> Dict[str, Any]:
+        """
+        Results of each path whose parser has parse_files, by path.
+
+        Such files are parsed one batch per file type, so their reads and
+        Tree-sitter parses overlap on threads. Each result is what
+        _parse_file takes as parsed: (nodes, source), or the error reading the
+        file. Other paths are left for _parse_file to parse one at a time.
+        """
+        batches: Dict[str, List[str]] = {}
+        for path in paths:
+            file_type = detect_file_type(path)
+            if file_type:
+                batches.setdefault(file_type, []).append(path)
+        parsed: Dict[str, Any] = {}
+        for file_type, batch in batches.items():
+            if len(batch) < 2:
+                continue
+            sources: Dict[str, Any] = {}
+            try:
+                parser = self.get_parser(file_type)
+                if not hasattr(parser, "parse_files"):
+                    continue
+                nodes = parser.parse_files(batch, sources)
+            except Exception:
+                # E.g. the parser cannot be built; _parse_file raises the same
+                # error for each file in the batch, recording it per file
+                continue
+            for path, source in sources.items():
+                parsed[path] = source if isinstance(source, Exception) else (nodes[path], source)
+        return parsed
+
+    def _split_cached(
+        self,
+        paths: List[str],
+        known_stats: Optional[Dict[str, os.stat_result]] = None,
+    ) -> Tuple[Dict[str, FileIndex], Dict[str, os.stat_result]]:
+        """
+        Split paths into cache hits and the pre-read stats of cache misses.
+
+        Stats in known_stats are used as is; other paths are stat'ed here.
+        Paths that cannot be stat'ed are in neither result.
+        """
+        cached: Dict[str, FileIndex] = {}
+        stats: Dict[str, os.stat_result] = {}
+        if self.cache is None:
+            return cached, stats
+        for path in paths:
+            st = known_stats.get(path) if known_stats else None
+            if st is None:
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+            hit = self.cache.get(path, st)
+            if hit is None:
+                stats[path] = st
+            else:
+                cached[path] = hit
+        return cached, stats
+
     def index_directory(
         self,
         root: str,
         extensions: Optional[List[str]] = None,
+        jobs: Optional[int] = None,
     ) -> Dict[str, FileIndex]:
-        """Index all matching files in a directory."""
-        files = find_files(root, extensions)
-        return self.index_files(files)
+        """
+        Index all matching files in a directory.
+
+        Large directories are parsed in parallel with up to `jobs` processes
+        (default: $GRAFTY_JOBS or the CPU count; 1 disables parallelism).
+        With a cache, only files changed since the last run are parsed.
+        """
+        return self._index_trees([root], [], extensions, jobs)
+
+    def index_paths(self, paths: List[str], jobs: Optional[int] = None) -> Dict[str, FileIndex]:
+        """
+        Index a mix of files and directories in one batch.
+
+        Directories are expanded first, so all files share one process pool
+        instead of one pool per directory. Paths are used as given, and a file
+        reached more than once is indexed once (first occurrence wins the
+        order, as with successive dict updates).
+        """
+        is_dir = {path: os.path.isdir(path) for path in paths}
+        roots = [path for path in paths if is_dir[path]]
+        files = [path for path in paths if not is_dir[path]]
+        return self._index_trees(roots, files, None, jobs, order=paths)
+
+    def _index_trees(
+        self,
+        roots: List[str],
+        files: List[str],
+        extensions: Optional[List[str]],
+        jobs: Optional[int],
+        order: Optional[List[str]] = None,
+    ) -> Dict[str, FileIndex]:
+        """Index the files under roots plus files, then refresh root manifests."""
+        known_stats: Dict[str, os.stat_result] = {}
+        if self.cache is not None:
+            # The walk's stats double as the cache stamps (no second os.stat)
+            found = {}
+            for root in roots:
+                pairs = find_files_with_stat(root, extensions)
+                found[root] = [path for path, _ in pairs]
+                known_stats.update((path, st) for path, st in pairs if st is not None)
+        else:
+            found = {root: find_files(root, extensions) for root in roots}
+        if order is None:
+            order = roots
+        batch: List[str] = []
+        for path in order:
+            batch.extend(found[path] if path in found else [path])
+        batch = list(dict.fromkeys(batch))
+
+        if jobs is None:
+            jobs = _default_jobs()
+        if self.cache is not None:
+            # One manifest read serves every unchanged file under each root
+            for root in roots:
+                self.cache.load_manifest(root)
+        if jobs > 1 and len(batch) > PARALLEL_THRESHOLD:
+            indices = self._index_files_parallel(batch, jobs, known_stats)
+        else:
+            indices = self._index_files(batch, known_stats)
+        if self.cache is not None and extensions is None:
+            for root, root_files in found.items():
+                self.cache.save_manifest(
+                    root, {path: indices[path] for path in root_files if path in indices}
+                )
+        return indices
+
+    def _index_files_parallel(
+        self,
+        paths: List[str],
+        jobs: int,
+        known_stats: Optional[Dict[str, os.stat_result]] = None,
+    ) -> Dict[str, FileIndex]:
+        """Index files across a process pool, preserving input order."""
+        # Only cache misses are sent to the pool
+        cached, stats = self._split_cached(paths, known_stats)
+        misses = [path for path in paths if path not in cached]
+
+        results: List[Tuple[str, Optional[FileIndex], Optional[str]]] = []
+        if misses:
+            # multiprocessing is only imported when a pool is actually needed
+            from concurrent.futures import ProcessPoolExecutor
+
+            chunksize = max(1, len(misses) // (jobs * 4))
+            try:
+                with ProcessPoolExecutor(max_workers=jobs) as executor:
+                    results = list(executor.map(_index_one, misses, chunksize=chunksize))
+            except (OSError, RuntimeError) as e:
+                # Process pools can be unavailable (e.g. restricted sandboxes)
+                print(
+                    f"Warning: parallel indexing unavailable ({e}); indexing sequentially",
+                    file=sys.stderr,
+                )
+                return self._index_files(paths, known_stats)
+
+        parsed: Dict[str, FileIndex] = {}
+        errors: List[Tuple[str, str]] = []
+        for path, file_index, error in results:
+            if file_index is None:
+                errors.append((path, error or ""))
+                continue
+            # Unpickled strings are fresh copies; share them again
+            parsed[path] = file_index.intern_strings()
+            if path in stats:
+                self.cache.put(path, stats[path], file_index)
+        if self.cache is not None:
+            self.cache.flush()
+        self.errors.extend(errors)
+
+        indices: Dict[str, FileIndex] = {}
+        for path in paths:
+            file_index = cached.get(path) or parsed.get(path)
+            if file_index is not None:
+                indices[path] = file_index
+        return indices
@@ -1,12 +1,22 @@
 """
 models.py — Core data structures for grafty
 """
-from dataclasses import dataclass, field
-from typing import Optional, List
-from hashlib import sha256
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field, fields
+from typing import Dict, Optional, List, Tuple
+from hashlib import blake2b
+import sys
 
 
-@dataclass
+# Most (path, kind) id prefixes kept hashed by Node.compute_id
+ID_PREFIX_CACHE_SIZE = 1024
+
+# (path, kind) -> blake2b state after hashing "path:kind:"
+_id_prefixes: Dict[Tuple[str, str], "blake2b"] = {}
+
+
+@dataclass(slots=True)
 class Node:
     """Structural unit (heading, function, etc.) in a file."""
 
@@ -29,9 +39,20 @@ class Node:
     is_method: Optional[bool] = None  # Python
     docstring: Optional[str] = None  # first 200 chars if available
 
-    def to_dict(self) -> dict:
-        """Convert to JSON-serializable dict."""
-        return {
+    def __post_init__(self) -> None:
+        # One shared object per distinct kind and per file path, however
+        # many nodes carry them
+        self.kind = sys.intern(self.kind)
+        self.path = sys.intern(self.path)
+
+    def to_dict(self, sparse: bool = False) -> dict:
+        """
+        Convert to JSON-serializable dict.
+
+        With sparse, fields that are None are left out; most of the optional
+        metadata is None for any one language. from_dict restores them.
+        """
+        data = {
             "id": self.id,
             "kind": self.kind,
             "name": self.name,
@@ -49,6 +70,17 @@ class Node:
             "is_method": self.is_method,
             "docstring": self.docstring,
         }
+        if sparse:
+            return {key: value for key, value in data.items() if value is not None}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Node":
+        """Rebuild a node from its to_dict() form."""
+        if data.keys() <= _NODE_FIELD_SET:
+            # The usual case (to_dict output): no unknown keys to drop
+            return cls(**data)
+        return cls(**{name: data[name] for name in _NODE_FIELDS if name in data})
 
     @staticmethod
     def compute_id(
@@ -58,14 +90,34 @@ class Node:
         start_line: int,
         signature: Optional[str] = None,
     ) -> str:
-        """Compute stable node ID via SHA256 hash."""
-        content = f"{path}:{kind}:{name}:{start_line}"
+        """
+        Compute stable node ID: 16 hex chars of an 8-byte BLAKE2b digest.
+
+        The digest is of "path:kind:name:start_line[:signature]". A parser
+        emits many nodes per (path, kind), so the hasher state after that
+        prefix is kept and copied rather than rehashing the prefix each time.
+        """
+        prefix = _id_prefixes.get((path, kind))
+        if prefix is None:
+            if len(_id_prefixes) >= ID_PREFIX_CACHE_SIZE:
+                _id_prefixes.clear()
+            prefix = _id_prefixes[(path, kind)] = blake2b(
+                f"{path}:{kind}:".encode(), digest_size=8
+            )
+        h = prefix.copy()
         if signature:
-            content += f":{signature}"
-        return sha256(content.encode()).hexdigest()[:16]
+            h.update(f"{name}:{start_line}:{signature}".encode())
+        else:
+            h.update(f"{name}:{start_line}".encode())
+        return h.hexdigest()
 
 
-@dataclass
+# Node's constructor arguments, computed once for from_dict
+_NODE_FIELDS = tuple(f.name for f in fields(Node))
+_NODE_FIELD_SET = frozenset(_NODE_FIELDS)
+
+
+@dataclass(slots=True)
 class SelectorResult:
     """Result of a selector resolution (exact or ambiguous)."""
 
@@ -86,7 +138,7 @@ class SelectorResult:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class FileIndex:
     """Index of all nodes in a file."""
 
@@ -94,19 +146,80 @@ class FileIndex:
     content_hash: str  # SHA256 of file content for drift detection
     mtime: float  # file modification time
     nodes: List[Node] = field(default_factory=list)
-    nodes_by_id: dict = field(default_factory=dict)
-
-    def to_dict(self) -> dict:
-        """Convert to JSON."""
+    # File lines (with line endings), retained only on request; never serialized
+    source_lines: Optional[List[str]] = field(default=None, repr=False, compare=False)
+    # (st_mtime_ns, st_size) of the file as source_lines were read (see patch.file_stamp)
+    stamp: Optional[Tuple[int, int]] = field(default=None, repr=False, compare=False)
+    _nodes_by_id: Optional[Dict[str, Node]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    # (start_lines, end_lines, positions) columns sorted by start line
+    _line_columns: Optional[Tuple[array, array, List[int]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    @property
+    def nodes_by_id(self) -> Dict[str, Node]:
+        """Node lookup by ID, built on first access."""
+        if self._nodes_by_id is None:
+            self._nodes_by_id = {node.id: node for node in self.nodes}
+        return self._nodes_by_id
+
+    def nodes_within_lines(self, start_line: int, end_line: int) -> List[Node]:
+        """
+        Nodes lying entirely within start_line..end_line, in self.nodes order.
+
+        Line numbers are kept in contiguous columns sorted by start line
+        (built on first use), so bisection narrows the scan to nodes that
+        start inside the range and only their end lines are compared.
+        """
+        if self._line_columns is None:
+            positions = sorted(range(len(self.nodes)), key=lambda i: self.nodes[i].start_line)
+            self._line_columns = (
+                array("l", (self.nodes[i].start_line for i in positions)),
+                array("l", (self.nodes[i].end_line for i in positions)),
+                positions,
+            )
+        starts, ends, positions = self._line_columns
+        lo = bisect_left(starts, start_line)
+        hi = bisect_right(starts, end_line)
+        hits = sorted(positions[i] for i in range(lo, hi) if ends[i] <= end_line)
+        return [self.nodes[i] for i in hits]
+
+    def to_dict(self, sparse: bool = False) -> dict:
+        """Convert to JSON (see Node.to_dict for sparse)."""
         return {
             "path": self.path,
             "content_hash": self.content_hash,
             "mtime": self.mtime,
-            "nodes": [n.to_dict() for n in self.nodes],
+            "nodes": [n.to_dict(sparse) for n in self.nodes],
         }
 
-
-@dataclass
+    @classmethod
+    def from_dict(cls, data: dict) -> "FileIndex":
+        """Rebuild a file index from its to_dict() form."""
+        return cls(
+            path=data["path"],
+            content_hash=data["content_hash"],
+            mtime=data["mtime"],
+            nodes=list(map(Node.from_dict, data["nodes"])),
+        )
+
+    def intern_strings(self) -> "FileIndex":
+        """
+        Intern node kinds and paths in place, and return self.
+
+        Node.__post_init__ already does this for constructed nodes; this is
+        for nodes that bypass __init__, such as unpickled ones.
+        """
+        for node in self.nodes:
+            node.kind = sys.intern(node.kind)
+            node.path = sys.intern(node.path)
+        return self
+
+
+@dataclass(slots=True)
 class PatchOperation:
     """Represents a file mutation (replace/insert/delete)."""
 
@@ -4,26 +4,26 @@ multi_file_patch.py — Atomic multi-file patch application (Phase 4.1, Phase 4.
 Provides PatchSet for managing coordinated changes across multiple files
 with atomic writes, validation, rollback support, and optional Git integration.
 """
-import json
+import os
 from dataclasses import dataclass, field
-from pathlib import Path
-from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
 
+from ._json import loads
 from .patch import (
-    apply_patch_to_buffer,
+    apply_operations,
+    file_stamp,
     generate_unified_diff,
-    normalize_newlines,
-    read_file_with_hash,
-    restore_newlines,
+    read_file_with_stat,
     validate_drift,
     write_atomic,
+    write_atomic_many,
 )
 
 if TYPE_CHECKING:
     from .vcs import GitConfig
 
 
-@dataclass
+@dataclass(slots=True)
 class FileMutation:
     """
     A single mutation (edit) to apply to a file.
@@ -69,15 +69,18 @@ class FileMutation:
         if len(parts) < 4:
             raise ValueError(f"Invalid simple format (need 4+ parts): {line}")
 
-        file_path = parts[0]
-        operation_kind = parts[1]
-        try:
-            start_line = int(parts[2])
-            end_line = int(parts[3])
-        except ValueError as e:
-            raise ValueError(f"Invalid line numbers in: {line}") from e
+        file_path, operation_kind, start, end, *rest = parts
+        if start.isdecimal() and end.isdecimal():
+            # The usual plain numbers; int() cannot fail on these
+            start_line, end_line = int(start), int(end)
+        else:
+            try:
+                start_line = int(start)
+                end_line = int(end)
+            except ValueError as e:
+                raise ValueError(f"Invalid line numbers in: {line}") from e
 
-        text = parts[4] if len(parts) > 4 else ""
+        text = rest[0] if rest else ""
 
         return FileMutation(
             file_path=file_path,
@@ -89,7 +92,7 @@ class FileMutation:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class PatchSetResult:
     """
     Result of patch validation, generation, or application.
@@ -130,7 +133,100 @@ class PatchSetResult:
         return "\n".join(lines)
 
 
-@dataclass
+# Mutation kinds PatchSet can apply
+OPERATION_KINDS = frozenset({"replace", "insert", "delete"})
+
+# Keys every mutation in a JSON patch must have
+_REQUIRED_FIELDS = frozenset({"file_path", "operation_kind", "start_line", "end_line"})
+
+# Errors listed individually by validate_all; the rest are summarized
+MAX_REPORTED_ERRORS = 100
+
+# Upper bound on reader threads for one batch of target files
+MAX_READ_WORKERS = 32
+
+
+def _read_one(path: str) -> Union[Tuple[str, str, Tuple[int, int]], Exception]:
+    """(content, hash, file_stamp) of path, or the exception raised reading it."""
+    try:
+        content, content_hash, st = read_file_with_stat(path)
+    except Exception as e:
+        return e
+    return content, content_hash, file_stamp(st)
+
+
+def _read_files(
+    paths: List[str],
+) -> Dict[str, Union[Tuple[str, str, Tuple[int, int]], Exception]]:
+    """
+    Read several files with read_file_with_stat, concurrently if more than one.
+
+    Reads release the GIL, so a thread pool overlaps their disk latency.
+    Each path maps to its (content, hash, file_stamp) or to the exception raised.
+    """
+    if len(paths) <= 1:
+        return {path: _read_one(path) for path in paths}
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(paths))) as executor:
+        return dict(zip(paths, executor.map(_read_one, paths)))
+
+
+# Line boundaries recognized by str.splitlines besides "\n" (and "\r", which
+# universal-newline reads have already translated)
+_OTHER_LINE_BREAKS = "\v\f\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+def _count_lines(content: str) -> int:
+    """
+    len(content.splitlines()), without building the list of lines.
+
+    Mutations are applied on splitlines() boundaries, so that is the count
+    to validate against. Content almost never holds the rarer boundaries, in
+    which case counting "\n" (a C-level scan per character) gives the same.
+    """
+    if any(ch in content for ch in _OTHER_LINE_BREAKS):
+        return len(content.splitlines())
+    return content.count("\n") + (not content.endswith("\n") and content != "")
+
+
+def _abs_paths(repo_root: str, file_paths: Iterable[str]) -> Dict[str, str]:
+    """Path of each file_path under repo_root, joined once per file."""
+    return {file_path: os.path.join(repo_root, file_path) for file_path in file_paths}
+
+
+def _apply_mutations(content: str, mutations: List[FileMutation]) -> str:
+    """
+    Apply one file's mutations to its content in a single split/join pass.
+
+    Mutations are applied bottom-up (by start_line, descending), so each
+    one's line numbers refer to the content as given.
+    """
+    return apply_operations(
+        content,
+        [
+            {
+                "kind": mut.operation_kind,
+                "start_line": mut.start_line,
+                "end_line": mut.end_line,
+                "text": mut.text,
+            }
+            for mut in mutations
+        ],
+    )
+
+
+@dataclass(slots=True)
+class _FileState:
+    """A target file as read once and shared by validation, diffing and applying."""
+
+    content: str  # UTF-8 text with universal newlines
+    content_hash: str
+    stamp: Tuple[int, int]  # file_stamp when read
+    line_count: int
+
+
+@dataclass(slots=True)
 class PatchSet:
     """
     Manages a set of mutations to apply atomically across multiple files.
@@ -145,6 +241,10 @@ class PatchSet:
     """
 
     mutations: List[FileMutation] = field(default_factory=list)
+    # Last successful validation: (repo_root, _validation_key(), result, files read)
+    _validated: Optional[Tuple[str, tuple, PatchSetResult, Dict[str, _FileState]]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def add_mutation(
         self,
@@ -176,6 +276,65 @@ class PatchSet:
         )
         self.mutations.append(mutation)
 
+    def _group_by_file(self) -> Dict[str, List[FileMutation]]:
+        """Mutations grouped by file_path, in order of first appearance."""
+        mutations_by_file: Dict[str, List[FileMutation]] = {}
+        for mut in self.mutations:
+            group = mutations_by_file.get(mut.file_path)
+            if group is None:
+                mutations_by_file[mut.file_path] = [mut]
+            else:
+                group.append(mut)
+        return mutations_by_file
+
+    def _validation_key(self) -> tuple:
+        """The mutation fields validate_all depends on, for comparing against _validated."""
+        return tuple(
+            (mut.file_path, mut.operation_kind, mut.start_line, mut.end_line)
+            for mut in self.mutations
+        )
+
+    def _validate_cached(
+        self, repo_root: str, reread: bool = False
+    ) -> Tuple[PatchSetResult, Dict[str, _FileState]]:
+        """
+        validate_all(repo_root) and the files it read, by file_path.
+
+        The last successful validation is reused while the mutations' paths,
+        kinds and line numbers are unchanged and every file still has the
+        stamp it was read with (one stat per file instead of a full re-read),
+        so validate_all and generate_diffs in turn read each file once.
+
+        A stamp can stay the same across an edit (coarse timestamps, same
+        size), so with reread, as before writing, the files are read again
+        instead and the validation is reused only if every hash matches.
+        """
+        memo = self._validated
+        if memo is not None and memo[0] == repo_root and memo[1] == self._validation_key():
+            _, _, validation, files = memo
+            abs_paths = _abs_paths(repo_root, files)
+            if reread:
+                reads = _read_files(list(abs_paths.values()))
+                fresh = {}
+                for file_path, state in files.items():
+                    read = reads[abs_paths[file_path]]
+                    if isinstance(read, Exception) or read[1] != state.content_hash:
+                        break  # changed or unreadable; validate again
+                    fresh[file_path] = _FileState(*read, state.line_count)
+                else:
+                    return validation, fresh
+            else:
+                try:
+                    if all(
+                        file_stamp(os.stat(abs_paths[file_path])) == state.stamp
+                        for file_path, state in files.items()
+                    ):
+                        return validation, files
+                except OSError:
+                    pass  # gone or unreadable; validate again to report it
+        files = {}
+        return self.validate_all(repo_root, files), files
+
     def load_from_simple_format(self, content: str) -> None:
         """
         Load mutations from simple line-based format.
@@ -207,7 +366,7 @@ class PatchSet:
             except ValueError as e:
                 raise ValueError(f"Line {i}: {e}") from e
 
-    def load_from_json(self, content: str) -> None:
+    def load_from_json(self, content: Union[str, bytes]) -> None:
         """
         Load mutations from JSON format.
 
@@ -226,7 +385,8 @@ class PatchSet:
             ]
 
         Args:
-            content: JSON string
+            content: JSON document, as a string or as UTF-8 bytes (parsed
+                without decoding first, which is faster for large patches)
 
         Raises:
             ValueError: If JSON is invalid or missing required fields
@@ -234,35 +394,39 @@ class PatchSet:
         self.mutations.clear()
 
         try:
-            data = json.loads(content)
-        except json.JSONDecodeError as e:
+            data = loads(content)
+        except ValueError as e:
             raise ValueError(f"Invalid JSON: {e}") from e
 
         if not isinstance(data, list):
             raise ValueError("JSON must be a list of mutations")
 
+        append = self.mutations.append
         for i, item in enumerate(data):
             if not isinstance(item, dict):
                 raise ValueError(f"Item {i} is not a dict: {item}")
 
-            required = {"file_path", "operation_kind", "start_line", "end_line"}
-            if not required.issubset(item.keys()):
-                raise ValueError(f"Item {i} missing required fields: {required}")
+            if not _REQUIRED_FIELDS <= item.keys():
+                raise ValueError(f"Item {i} missing required fields: {set(_REQUIRED_FIELDS)}")
 
             try:
-                mutation = FileMutation(
-                    file_path=item["file_path"],
-                    operation_kind=item["operation_kind"],
-                    start_line=int(item["start_line"]),
-                    end_line=int(item["end_line"]),
-                    text=item.get("text", ""),
-                    description=item.get("description", ""),
+                # Positional arguments, in field order: cheaper than keywords
+                append(
+                    FileMutation(
+                        item["file_path"],
+                        item["operation_kind"],
+                        int(item["start_line"]),
+                        int(item["end_line"]),
+                        item.get("text", ""),
+                        item.get("description", ""),
+                    )
                 )
-                self.mutations.append(mutation)
             except (ValueError, TypeError) as e:
                 raise ValueError(f"Item {i} has invalid values: {e}") from e
 
-    def validate_all(self, repo_root: str = ".") -> PatchSetResult:
+    def validate_all(
+        self, repo_root: str = ".", files: Optional[Dict[str, _FileState]] = None
+    ) -> PatchSetResult:
         """
         Validate all mutations before applying.
 
@@ -274,12 +438,19 @@ class PatchSet:
 
         Args:
             repo_root: Root directory for relative file paths
+            files: If given, filled with each file as read here, by file_path,
+                so later phases need not read it again
 
         Returns:
             PatchSetResult with success flag and error details
         """
         errors: List[str] = []
+        # Errors past MAX_REPORTED_ERRORS are only counted, never formatted
+        unlisted = 0
         warnings: List[str] = []
+        self._validated = None
+        if files is None:
+            files = {}
 
         if not self.mutations:
             return PatchSetResult(
@@ -289,42 +460,57 @@ class PatchSet:
             )
 
         # Group mutations by file
-        mutations_by_file: Dict[str, List[FileMutation]] = {}
-        for mut in self.mutations:
-            if mut.file_path not in mutations_by_file:
-                mutations_by_file[mut.file_path] = []
-            mutations_by_file[mut.file_path].append(mut)
+        mutations_by_file = self._group_by_file()
+        abs_paths = _abs_paths(repo_root, mutations_by_file)
+
+        # Read every file up front, overlapping the reads on threads
+        reads = _read_files(list(abs_paths.values()))
 
         # Validate each file and its mutations
         for file_path, file_mutations in mutations_by_file.items():
-            abs_path = Path(repo_root) / file_path
-
-            # Check file exists
-            if not abs_path.exists():
-                errors.append(f"File not found: {file_path}")
+            # A missing file shows up as the read's ENOENT; no separate stat
+            read = reads[abs_paths[file_path]]
+            if isinstance(read, Exception):
+                if len(errors) >= MAX_REPORTED_ERRORS:
+                    unlisted += 1
+                elif isinstance(read, FileNotFoundError):
+                    errors.append(f"File not found: {file_path}")
+                else:
+                    errors.append(f"Cannot read {file_path}: {read}")
                 continue
 
-            # Read file and validate line numbers
-            try:
-                content = abs_path.read_text(encoding="utf-8")
-                lines = content.splitlines()
-                file_line_count = len(lines)
-            except Exception as e:
-                errors.append(f"Cannot read {file_path}: {e}")
-                continue
+            # Validate line numbers against the file as read
+            content, content_hash, stamp = read
+            file_line_count = _count_lines(content)
+            files[file_path] = _FileState(content, content_hash, stamp, file_line_count)
 
-            # Validate each mutation
+            # Validate each mutation, collecting this file's errors while there
+            # is room to list them
+            file_errors: List[str] = []
+            room = MAX_REPORTED_ERRORS - len(errors)
             for i, mut in enumerate(file_mutations):
+                kind, start, end = mut.operation_kind, mut.start_line, mut.end_line
+                if (
+                    kind in OPERATION_KINDS
+                    and 1 <= start <= end
+                    and start <= file_line_count
+                    and (end <= file_line_count or kind == "insert")
+                ):
+                    continue  # valid; the checks below only explain failures
+                if len(file_errors) >= room:
+                    unlisted += 1  # invalid, but past the listed errors
+                    continue
+
                 # Check operation kind
-                if mut.operation_kind not in ("replace", "insert", "delete"):
-                    errors.append(
+                if kind not in OPERATION_KINDS:
+                    file_errors.append(
                         f"{file_path}[{i}]: Invalid operation_kind: {mut.operation_kind}"
                     )
                     continue
 
                 # Check line numbers are positive
                 if mut.start_line < 1 or mut.end_line < 1:
-                    errors.append(
+                    file_errors.append(
                         f"{file_path}[{i}]: Line numbers must be >= 1 "
                         f"(got {mut.start_line}-{mut.end_line})"
                     )
@@ -332,7 +518,7 @@ class PatchSet:
 
                 # Check start <= end
                 if mut.start_line > mut.end_line:
-                    errors.append(
+                    file_errors.append(
                         f"{file_path}[{i}]: start_line > end_line "
                         f"({mut.start_line} > {mut.end_line})"
                     )
@@ -340,42 +526,62 @@ class PatchSet:
 
                 # Check lines are within file
                 if mut.start_line > file_line_count:
-                    errors.append(
+                    file_errors.append(
                         f"{file_path}[{i}]: start_line {mut.start_line} > file size {file_line_count}"
                     )
                     continue
 
                 if mut.end_line > file_line_count and mut.operation_kind != "insert":
-                    errors.append(
+                    file_errors.append(
                         f"{file_path}[{i}]: end_line {mut.end_line} > file size {file_line_count}"
                     )
                     continue
 
-            # Check for overlaps
-            sorted_muts = sorted(file_mutations, key=lambda m: (m.start_line, m.end_line))
-            for i in range(len(sorted_muts) - 1):
-                curr = sorted_muts[i]
-                next_mut = sorted_muts[i + 1]
-                if curr.end_line >= next_mut.start_line:
-                    warnings.append(
-                        f"{file_path}: Mutations {i} and {i+1} overlap "
-                        f"({curr.start_line}-{curr.end_line} vs {next_mut.start_line}-{next_mut.end_line})"
-                    )
+            errors.extend(file_errors)
+
+            # Check for overlaps: sort plain (start, end) pairs, which compare in
+            # C, and sweep them once. Each span is compared with its sorted
+            # predecessor, and with the earlier span reaching furthest so far
+            # if that is another one, so a long span is reported against
+            # every later span it covers, not just the next.
+            spans = sorted([(mut.start_line, mut.end_line) for mut in file_mutations])
+            if len(spans) > 1:
+                reach, (reach_start, reach_end) = 0, spans[0]
+                prev_start, prev_end = spans[0]
+                for i, (start, end) in enumerate(spans[1:], start=1):
+                    if prev_end >= start:
+                        warnings.append(
+                            f"{file_path}: Mutations {i - 1} and {i} overlap "
+                            f"({prev_start}-{prev_end} vs {start}-{end})"
+                        )
+                    if reach != i - 1 and reach_end >= start:
+                        warnings.append(
+                            f"{file_path}: Mutations {reach} and {i} overlap "
+                            f"({reach_start}-{reach_end} vs {start}-{end})"
+                        )
+                    if end > reach_end:
+                        reach, reach_start, reach_end = i, start, end
+                    prev_start, prev_end = start, end
 
         # Overall result
         if errors:
+            error_count = len(errors) + unlisted
+            if unlisted:
+                errors.append(f"... and {unlisted} more error(s)")
             return PatchSetResult(
                 success=False,
-                message=f"Validation failed: {len(errors)} error(s)",
+                message=f"Validation failed: {error_count} error(s)",
                 errors=errors,
                 warnings=warnings,
             )
 
-        return PatchSetResult(
+        result = PatchSetResult(
             success=True,
             message=f"Validation passed: {len(self.mutations)} mutation(s) in {len(mutations_by_file)} file(s)",
             warnings=warnings,
         )
+        self._validated = (repo_root, self._validation_key(), result, files)
+        return result
 
     def generate_diffs(self, repo_root: str = ".") -> PatchSetResult:
         """
@@ -389,8 +595,8 @@ class PatchSet:
         Returns:
             PatchSetResult with diffs dict {file_path: unified_diff_string}
         """
-        # First validate
-        validation = self.validate_all(repo_root)
+        # First validate (or reuse an earlier validation), keeping the files read
+        validation, files = self._validate_cached(repo_root)
         if not validation.success:
             return validation
 
@@ -398,32 +604,14 @@ class PatchSet:
         errors: List[str] = []
 
         # Group mutations by file and apply in order
-        mutations_by_file: Dict[str, List[FileMutation]] = {}
-        for mut in self.mutations:
-            if mut.file_path not in mutations_by_file:
-                mutations_by_file[mut.file_path] = []
-            mutations_by_file[mut.file_path].append(mut)
+        mutations_by_file = self._group_by_file()
 
         for file_path, file_mutations in mutations_by_file.items():
-            abs_path = Path(repo_root) / file_path
-
             try:
-                original = abs_path.read_text(encoding="utf-8")
-                modified = original
-                normalized, newline_mode = normalize_newlines(original)
-
-                # Apply mutations in reverse order to preserve line numbers
-                for mut in sorted(file_mutations, key=lambda m: m.start_line, reverse=True):
-                    operation = {
-                        "kind": mut.operation_kind,
-                        "start_line": mut.start_line,
-                        "end_line": mut.end_line,
-                        "text": mut.text,
-                    }
-                    normalized = apply_patch_to_buffer(normalized, operation)
-
-                # Restore newlines
-                modified = restore_newlines(normalized, newline_mode)
+                # Content was read with universal newlines, so it is already LF
+                # and needs no normalize_newlines/restore_newlines round trip
+                original = files[file_path].content
+                modified = _apply_mutations(original, file_mutations)
 
                 # Generate diff
                 diff = generate_unified_diff(original, modified, file_path)
@@ -473,69 +661,49 @@ class PatchSet:
         Returns:
             PatchSetResult with success flag and file list
         """
-        # First validate
-        validation = self.validate_all(repo_root)
+        # First validate (or reuse an earlier validation over freshly read files)
+        validation, files = self._validate_cached(repo_root, reread=True)
         if not validation.success:
             return validation
+        # The files are about to change, so later calls must read them again
+        self._validated = None
 
         # Prepare file states for rollback
-        file_states: Dict[str, Tuple[str, str, float]] = {}  # {path: (content, hash, mtime)}
-        mutations_by_file: Dict[str, List[FileMutation]] = {}
+        # {path: (content, hash, stamp)}
+        file_states: Dict[str, Tuple[str, str, Tuple[int, int]]] = {}
+        mutations_by_file = self._group_by_file()
+        abs_paths = _abs_paths(repo_root, mutations_by_file)
 
         try:
-            # Read all files first (group mutations by file)
-            for mut in self.mutations:
-                if mut.file_path not in mutations_by_file:
-                    mutations_by_file[mut.file_path] = []
-                mutations_by_file[mut.file_path].append(mut)
-
             for file_path in mutations_by_file.keys():
-                abs_path = Path(repo_root) / file_path
-                content, file_hash, mtime = read_file_with_hash(str(abs_path))
-                file_states[file_path] = (content, file_hash, mtime)
+                abs_path = abs_paths[file_path]
+                state = files[file_path]
+                content, file_hash, stamp = state.content, state.content_hash, state.stamp
+                file_states[file_path] = (content, file_hash, stamp)
 
                 # Check drift if not forced
                 if not force:
                     try:
-                        validate_drift(str(abs_path), file_hash, force)
+                        validate_drift(abs_path, file_hash, force, expected_stamp=stamp)
                     except ValueError as e:
                         raise ValueError(str(e)) from e
 
             # Apply mutations to each file
+            # (contents were read with universal newlines, so they are LF already)
             modified_files: Dict[str, str] = {}  # {path: modified_content}
-            newline_modes: Dict[str, str] = {}  # {path: newline_mode}
 
             for file_path, file_mutations in mutations_by_file.items():
                 original, _, _ = file_states[file_path]
-                modified = original
-                normalized, newline_mode = normalize_newlines(original)
-                newline_modes[file_path] = newline_mode
-
-                # Sort mutations by line number (descending) to preserve line numbers
-                for mut in sorted(file_mutations, key=lambda m: m.start_line, reverse=True):
-                    operation = {
-                        "kind": mut.operation_kind,
-                        "start_line": mut.start_line,
-                        "end_line": mut.end_line,
-                        "text": mut.text,
-                    }
-                    normalized = apply_patch_to_buffer(normalized, operation)
-
-                # Restore newlines
-                modified = restore_newlines(normalized, newline_mode)
-                modified_files[file_path] = modified
-
-            # Write all files atomically
-            for file_path, modified_content in modified_files.items():
-                abs_path = Path(repo_root) / file_path
-                newline_mode = newline_modes[file_path]
-
-                write_atomic(
-                    str(abs_path),
-                    modified_content,
-                    backup=backup,
-                    newline_mode=newline_mode,
-                )
+                modified_files[file_path] = _apply_mutations(original, file_mutations)
+
+            # Write all files atomically: every temp file first, then the renames
+            write_atomic_many(
+                [
+                    (abs_paths[file_path], modified_content, "lf")
+                    for file_path, modified_content in modified_files.items()
+                ],
+                backup=backup,
+            )
 
             # Handle Git integration (Phase 4.2) if configured
             result_message = f"Applied patch to {len(modified_files)} file(s)"
@@ -547,9 +715,7 @@ class PatchSet:
 
                     # Stage and commit changes
                     if git_config.auto_commit:
-                        modified_abs_paths = [
-                            str(Path(repo_root) / f) for f in modified_files.keys()
-                        ]
+                        modified_abs_paths = [abs_paths[f] for f in modified_files.keys()]
                         commit_hash = git_repo.stage_and_commit(
                             modified_abs_paths, git_config.commit_message
                         )
@@ -566,14 +732,7 @@ class PatchSet:
                     rollback_errors = []
                     for file_path, (original_content, _, _) in file_states.items():
                         try:
-                            abs_path = Path(repo_root) / file_path
-                            _, newline_mode = normalize_newlines(original_content)
-                            write_atomic(
-                                str(abs_path),
-                                original_content,
-                                backup=False,
-                                newline_mode=newline_mode,
-                            )
+                            write_atomic(abs_paths[file_path], original_content, backup=False)
                         except Exception as rollback_e:
                             rollback_errors.append(f"Rollback {file_path}: {rollback_e}")
 
@@ -600,14 +759,7 @@ class PatchSet:
 
             for file_path, (original_content, _, _) in file_states.items():
                 try:
-                    abs_path = Path(repo_root) / file_path
-                    _, newline_mode = normalize_newlines(original_content)
-                    write_atomic(
-                        str(abs_path),
-                        original_content,
-                        backup=False,
-                        newline_mode=newline_mode,
-                    )
+                    write_atomic(abs_paths[file_path], original_content, backup=False)
                 except Exception as rollback_e:
                     rollback_errors.append(f"Rollback {file_path}: {rollback_e}")
 
@@ -1,69 +1,78 @@
 """
 Parsers for different file types.
+
+Parser classes are imported from their modules on first access (PEP 562),
+so importing this package does not load every language's grammar bindings.
 """
-from .python_ts import PythonParser
-from .markdown_ts import MarkdownParser
-from .org import OrgParser
-from .clojure_ts import ClojureParser
-from .javascript_ts import JavaScriptParser
-from .go_ts import GoParser
-from .rust_ts import RustParser
-from .html_parser import HTMLParser
-from .css_parser import CSSParser
-from .json_parser import JsonParser
-from .bash_ts import BashParser
-from .java_ts import JavaParser
-from .typescript_ts import TypeScriptParser
-from .csharp_ts import CSharpParser
-from .kotlin_ts import KotlinParser
-from .swift_ts import SwiftParser
+import os
+from importlib import import_module
+
+# Parser class name to the module defining it
+_PARSER_MODULES = {
+    "PythonParser": ".python_ts",
+    "MarkdownParser": ".markdown_ts",
+    "OrgParser": ".org",
+    "ClojureParser": ".clojure_ts",
+    "JavaScriptParser": ".javascript_ts",
+    "GoParser": ".go_ts",
+    "RustParser": ".rust_ts",
+    "HTMLParser": ".html_parser",
+    "CSSParser": ".css_parser",
+    "JsonParser": ".json_parser",
+    "BashParser": ".bash_ts",
+    "JavaParser": ".java_ts",
+    "TypeScriptParser": ".typescript_ts",
+    "CSharpParser": ".csharp_ts",
+    "KotlinParser": ".kotlin_ts",
+    "SwiftParser": ".swift_ts",
+}
 
-__all__ = [
-    "PythonParser",
-    "MarkdownParser",
-    "OrgParser",
-    "ClojureParser",
-    "JavaScriptParser",
-    "GoParser",
-    "RustParser",
-    "HTMLParser",
-    "CSSParser",
-    "JsonParser",
-    "BashParser",
-    "JavaParser",
-    "TypeScriptParser",
-    "CSharpParser",
-    "KotlinParser",
-    "SwiftParser",
-]
+__all__ = list(_PARSER_MODULES) + ["PARSER_REGISTRY", "get_parser_for_file"]
 
-# File extension to parser mapping
-PARSER_REGISTRY = {
-    ".html": HTMLParser,
-    ".htm": HTMLParser,
-    ".css": CSSParser,
-    ".py": PythonParser,
-    ".md": MarkdownParser,
-    ".org": OrgParser,
-    ".clj": ClojureParser,
-    ".cljs": ClojureParser,
-    ".js": JavaScriptParser,
-    ".jsx": JavaScriptParser,
-    ".ts": TypeScriptParser,
-    ".tsx": TypeScriptParser,
-    ".go": GoParser,
-    ".rs": RustParser,
-    ".json": JsonParser,
-    ".sh": BashParser,
-    ".bash": BashParser,
-    ".java": JavaParser,
-    ".cs": CSharpParser,
-    ".kt": KotlinParser,
-    ".kts": KotlinParser,
-    ".swift": SwiftParser,
+# File extension to parser class name (see PARSER_REGISTRY)
+_EXTENSION_PARSERS = {
+    ".html": "HTMLParser",
+    ".htm": "HTMLParser",
+    ".css": "CSSParser",
+    ".py": "PythonParser",
+    ".md": "MarkdownParser",
+    ".org": "OrgParser",
+    ".clj": "ClojureParser",
+    ".cljs": "ClojureParser",
+    ".js": "JavaScriptParser",
+    ".jsx": "JavaScriptParser",
+    ".ts": "TypeScriptParser",
+    ".tsx": "TypeScriptParser",
+    ".go": "GoParser",
+    ".rs": "RustParser",
+    ".json": "JsonParser",
+    ".sh": "BashParser",
+    ".bash": "BashParser",
+    ".java": "JavaParser",
+    ".cs": "CSharpParser",
+    ".kt": "KotlinParser",
+    ".kts": "KotlinParser",
+    ".swift": "SwiftParser",
 }
 
 
+def __getattr__(name: str):
+    """Import parser classes, and PARSER_REGISTRY, on first access."""
+    if name in _PARSER_MODULES:
+        value = getattr(import_module(_PARSER_MODULES[name], __name__), name)
+    elif name == "PARSER_REGISTRY":
+        # File extension to parser mapping (imports every parser)
+        value = {ext: __getattr__(cls_name) for ext, cls_name in _EXTENSION_PARSERS.items()}
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
 def get_parser_for_file(file_path: str):
     """Get the appropriate parser for a file based on its extension.
     
@@ -73,6 +82,7 @@ def get_parser_for_file(file_path: str):
     Returns:
         Parser class appropriate for the file type, or None if no parser found
     """
-    import pathlib
-    ext = pathlib.Path(file_path).suffix.lower()
-    return PARSER_REGISTRY.get(ext)
+    cls_name = _EXTENSION_PARSERS.get(os.path.splitext(file_path)[1].lower())
+    if cls_name is None:
+        return None
+    return globals().get(cls_name) or __getattr__(cls_name)
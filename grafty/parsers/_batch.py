@@ -0,0 +1,74 @@
+"""
+_batch.py — Parsing many files with Tree-sitter on a thread pool.
+"""
+import os
+import threading
+from typing import Any, List, Optional, Tuple, Union
+
+from tree_sitter import Parser
+
+from ..utils import read_source_with_stat
+
+# A file's bytes (as read_source_bytes returns them) and its stat
+Source = Tuple[bytes, os.stat_result]
+
+# (path, tree or exception, source) as returned by parse_trees
+ParsedTree = Tuple[str, Union[Any, Exception], Optional[Source]]
+
+
+def parse_trees(language: Any, paths: List[str]) -> List[ParsedTree]:
+    """
+    Read and parse each path with language; return [(path, tree, source)] in order.
+
+    Tree-sitter releases the GIL while it parses (as file reads do), so the
+    reads and parses run on a thread pool, each thread with its own Parser.
+    Failures are per path: a file that cannot be read has the read error in
+    place of its tree and None for its source, and a failed parse has the
+    parse error in place of its tree, so callers can report either.
+    """
+    if len(paths) <= 1 or (os.cpu_count() or 1) <= 1:
+        parser = Parser(language)
+        return [_parse_one(parser, path) for path in paths]
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    local = threading.local()
+
+    def parse(path: str) -> ParsedTree:
+        parser = getattr(local, "parser", None)
+        if parser is None:
+            parser = local.parser = Parser(language)
+        return _parse_one(parser, path)
+
+    with ThreadPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as executor:
+        return list(executor.map(parse, paths))
+
+
+def _parse_one(parser: Parser, path: str) -> ParsedTree:
+    """(path, tree or the exception reading or parsing raised, source)."""
+    try:
+        source = read_source_with_stat(path)
+    except Exception as e:
+        return path, e, None
+    try:
+        return path, parser.parse(source[0]), source
+    except Exception as e:
+        return path, e, source
+
+
+def record_source(
+    path: str,
+    tree: Union[Any, Exception],
+    source: Optional[Source],
+    sources: Optional[dict],
+) -> bool:
+    """
+    Record a parse_trees result's source, or read error, in sources if given.
+
+    Return whether the file was read; without sources, a read error raises.
+    """
+    if sources is not None:
+        sources[path] = tree if source is None else source
+    elif source is None:
+        raise tree
+    return source is not None
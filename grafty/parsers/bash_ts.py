@@ -2,8 +2,7 @@
 bash_ts.py — Bash/Shell indexing via Tree-sitter.
 Supports: .sh, .bash files
 """
-from typing import List, Optional
-from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 try:
     from tree_sitter import Language, Parser
@@ -15,26 +14,63 @@ except ImportError as e:
     ) from e
 
 from ..models import Node
+from ..utils import read_source_bytes
+from ._batch import parse_trees, record_source
 
 
 class BashParser:
     """Index Bash/Shell files using Tree-sitter."""
 
+    # Grammar shared by every instance (see _get_language)
+    _language: Optional[Language] = None
+
+    @classmethod
+    def _get_language(cls) -> Language:
+        """The Bash grammar, loaded once per process."""
+        if cls._language is None:
+            cls._language = Language(tree_sitter_bash.language())
+        return cls._language
+
     def __init__(self) -> None:
-        self.language = Language(tree_sitter_bash.language())
+        self.language = self._get_language()
         self.parser = Parser(self.language)
 
     def parse_file(self, file_path: str) -> List[Node]:
         """Index a Bash file and return list of nodes."""
-        p = Path(file_path)
-        content = p.read_text(encoding="utf-8")
+        content = read_source_bytes(file_path)
 
         try:
-            tree = self.parser.parse(content.encode("utf-8"))
+            tree = self.parser.parse(content)
         except Exception as e:
             print(f"Warning: Failed to parse {file_path}: {e}")
             return []
+        return self._extract_nodes(tree, file_path)
+
+    def parse_files(
+        self, file_paths: List[str], sources: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[Node]]:
+        """
+        parse_file for several files, reading and parsing them concurrently.
+
+        Only the reads and Tree-sitter parses run on threads (see
+        parse_trees); nodes are built here, on the calling thread. If sources
+        is given it is filled with each file's source (see parse_trees), or
+        the error reading it, and unreadable files are left out of the result;
+        otherwise an unreadable file raises, as in parse_file.
+        """
+        results: Dict[str, List[Node]] = {}
+        for file_path, tree, source in parse_trees(self.language, file_paths):
+            if not record_source(file_path, tree, source, sources):
+                continue
+            if isinstance(tree, Exception):
+                print(f"Warning: Failed to parse {file_path}: {tree}")
+                results[file_path] = []
+            else:
+                results[file_path] = self._extract_nodes(tree, file_path)
+        return results
 
+    def _extract_nodes(self, tree, file_path: str) -> List[Node]:
+        """Function and doc comment nodes from a parsed file."""
         nodes: List[Node] = []
         for child in tree.root_node.children:
             if child.type == "function_definition":
@@ -78,7 +114,8 @@ class BashParser:
         self, ts_node, file_path: str, parent_node: Node
     ) -> Optional[Node]:
         """Extract comment block immediately preceding a function."""
-        comments = []
+        # Block bounds; walking backwards, each comment kept becomes the first
+        first = last = None
         prev = ts_node.prev_named_sibling
         # Walk backwards, collecting only contiguous comment lines
         expected_line = ts_node.start_point[0]  # 0-indexed line before function
@@ -87,19 +124,20 @@ class BashParser:
             # Must be contiguous (allow 1 blank line gap max)
             if expected_line - prev_end > 1:
                 break
-            # Skip shebangs
-            text = prev.text.decode("utf-8")
-            if text.startswith("#!"):
+            # Skip shebangs (checked on the raw bytes; only names are decoded)
+            if prev.text.startswith(b"#!"):
                 break
-            comments.insert(0, prev)
+            first = prev
+            if last is None:
+                last = prev
             expected_line = prev.start_point[0]
             prev = prev.prev_named_sibling
 
-        if not comments:
+        if first is None:
             return None
 
-        start_line = comments[0].start_point[0] + 1
-        end_line = comments[-1].end_point[0] + 1
+        start_line = first.start_point[0] + 1
+        end_line = last.end_point[0] + 1
         node_id = Node.compute_id(
             file_path, "bash_doc", parent_node.name, start_line
         )
@@ -110,7 +148,7 @@ class BashParser:
             path=file_path,
             start_line=start_line,
             end_line=end_line,
-            start_byte=comments[0].start_byte,
-            end_byte=comments[-1].end_byte,
+            start_byte=first.start_byte,
+            end_byte=last.end_byte,
             parent_id=parent_node.id,
         )
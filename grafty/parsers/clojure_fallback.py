@@ -1,10 +1,36 @@
 """
 clojure_fallback.py — Fallback balanced-paren scanner for Clojure.
+
+The scanner works on the file's UTF-8 bytes (see read_source_bytes), so
+start_byte/end_byte are byte offsets, as with the Tree-sitter parsers;
+only names are decoded.
 """
+import re
+from bisect import bisect_left
 from typing import List, Optional, Tuple
-from pathlib import Path
 
 from ..models import Node
+from ..utils import read_source_bytes
+
+# The characters _scan_form acts on: a whole string literal (through its
+# closing quote, skipping backslash escapes), a paren, or a quote that
+# opens a string running to the end of the content
+_FORM_TOKENS = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[()"]', re.DOTALL)
+
+_NEWLINE = re.compile(b"\n")
+
+# Node kind per def-like keyword, keyed by its raw bytes; other def* forms
+# are "clj_def"
+CLJ_KINDS = {
+    b"defn": "clj_defn",
+    b"defmacro": "clj_defmacro",
+    b"defmulti": "clj_defmulti",
+    b"defmethod": "clj_defmethod",
+    b"ns": "clj_ns",
+}
+
+# Byte values of the characters compared one at a time (content[i] is an int)
+_OPEN_PAREN, _QUOTE, _BACKSLASH = b'("\\'
 
 
 class ClojureFallbackParser:
@@ -13,102 +39,93 @@ class ClojureFallbackParser:
     def __init__(self):
         pass
 
-    def parse_file(self, file_path: str) -> List[Node]:
-        """Index a Clojure file using balanced-paren scanning."""
-        p = Path(file_path)
-        content = p.read_text(encoding="utf-8")
+    def parse_file(self, file_path: str, content: Optional[bytes] = None) -> List[Node]:
+        """
+        Index a Clojure file using balanced-paren scanning.
+
+        content, if given, is the file as read by read_source_bytes.
+        """
+        if content is None:
+            content = read_source_bytes(file_path)
+
+        # Offset of every newline, so any offset's line is a binary search
+        newlines = [match.start() for match in _NEWLINE.finditer(content)]
 
         nodes: List[Node] = []
-        i = 0
-
-        while i < len(content):
-            # Look for opening paren
-            if content[i] == "(":
-                # Try to parse form
-                form_text, form_start, form_end = self._scan_form(content, i)
-                if form_text:
-                    form_lines = self._get_form_lines(content, form_start, form_end)
-                    start_line, end_line = form_lines
-
-                    # Try to extract def/ns
-                    def_node = self._parse_form(
-                        form_text,
-                        file_path,
-                        start_line,
-                        end_line,
-                        form_start,
-                        form_end,
+
+        # Jump from one opening paren to the next with bytes.find (a C scan)
+        i = content.find(b"(")
+        while i != -1:
+            # Try to parse form
+            form_text, form_start, form_end = self._scan_form(content, i)
+            if form_text:
+                form_lines = self._get_form_lines(newlines, form_start, form_end)
+                start_line, end_line = form_lines
+
+                # Try to extract def/ns
+                def_node = self._parse_form(
+                    form_text,
+                    file_path,
+                    start_line,
+                    end_line,
+                    form_start,
+                    form_end,
+                )
+                if def_node:
+                    nodes.append(def_node)
+
+                    # Extract docstring if present
+                    doc_node = self._extract_docstring(
+                        form_text, content, newlines, file_path,
+                        def_node, form_start,
                     )
-                    if def_node:
-                        nodes.append(def_node)
-
-                        # Extract docstring if present
-                        doc_node = self._extract_docstring(
-                            form_text, content, file_path,
-                            def_node, form_start,
-                        )
-                        if doc_node:
-                            nodes.append(doc_node)
-
-                    i = form_end
-                else:
-                    i += 1
+                    if doc_node:
+                        nodes.append(doc_node)
+
+                i = form_end
             else:
                 i += 1
+            i = content.find(b"(", i)
 
         return nodes
 
-    def _scan_form(self, content: str, start: int) -> Tuple[str, int, int]:
+    def _scan_form(self, content: bytes, start: int) -> Tuple[bytes, int, int]:
         """
         Scan a balanced-paren form starting at position `start`.
         Returns (form_text, start_pos, end_pos).
         """
-        if start >= len(content) or content[start] != "(":
-            return "", start, start
+        if start >= len(content) or content[start] != _OPEN_PAREN:
+            return b"", start, start
 
+        # Jump between parens and string literals with the regex engine
+        # instead of stepping through every character in Python
         depth = 0
-        in_string = False
-        escape = False
-        i = start
-
-        while i < len(content):
-            char = content[i]
-
-            # Handle strings
-            if char == '"' and not escape:
-                in_string = not in_string
-
-            # Handle escapes
-            if char == "\\" and in_string:
-                escape = not escape
-            else:
-                escape = False
-
-            # Count parens only outside strings
-            if not in_string:
-                if char == "(":
-                    depth += 1
-                elif char == ")":
-                    depth -= 1
-                    if depth == 0:
-                        # Found closing paren
-                        form_text = content[start:i + 1]
-                        return form_text, start, i + 1
-
-            i += 1
+        for match in _FORM_TOKENS.finditer(content, start):
+            char = match.group()
+            if char == b"(":
+                depth += 1
+            elif char == b")":
+                depth -= 1
+                if depth == 0:
+                    # Found closing paren
+                    end = match.end()
+                    return content[start:end], start, end
+            elif char == b'"':
+                break  # unterminated string: the form never closes
 
         # Unclosed form
-        return "", start, start
+        return b"", start, start
 
-    def _get_form_lines(self, content: str, start: int, end: int) -> Tuple[int, int]:
-        """Get line numbers (1-indexed) for byte range [start:end)."""
-        start_line = content[:start].count("\n") + 1
-        end_line = content[:end].count("\n") + 1
+    def _get_form_lines(self, newlines: List[int], start: int, end: int) -> Tuple[int, int]:
+        """Get line numbers (1-indexed) for byte range [start:end), given the newline offsets."""
+        # A position's line is one plus the number of newlines before it
+        start_line = bisect_left(newlines, start) + 1
+        end_line = bisect_left(newlines, end) + 1
         return start_line, end_line
 
     def _parse_form(
         self,
-        form_text: str,
+        form_text: bytes,
         file_path: str,
         start_line: int,
         end_line: int,
@@ -129,7 +146,7 @@ class ClojureFallbackParser:
         keyword, rest = tokens[0], tokens[1]
 
         # Check if it's a def-like form
-        if not keyword.startswith("def") and keyword != "ns":
+        if not keyword.startswith(b"def") and keyword != b"ns":
             return None
 
         # Extract name (first token in rest)
@@ -137,15 +154,9 @@ class ClojureFallbackParser:
         if not name_tokens:
             return None
 
-        name = name_tokens[0]
-
-        kind = {
-            "defn": "clj_defn",
-            "defmacro": "clj_defmacro",
-            "defmulti": "clj_defmulti",
-            "defmethod": "clj_defmethod",
-            "ns": "clj_ns",
-        }.get(keyword, "clj_def")
+        kind = CLJ_KINDS.get(keyword, "clj_def")
+        keyword = keyword.decode("utf-8")
+        name = name_tokens[0].decode("utf-8")
 
         node_id = Node.compute_id(file_path, kind, name, start_line, keyword)
 
@@ -168,8 +179,9 @@ class ClojureFallbackParser:
 
     def _extract_docstring(
         self,
-        form_text: str,
-        content: str,
+        form_text: bytes,
+        content: bytes,
+        newlines: List[int],
         file_path: str,
         parent_node: Node,
         form_start: int,
@@ -185,24 +197,25 @@ class ClojureFallbackParser:
             return None
 
         rest = tokens[2].strip()
-        if not rest.startswith('"'):
+        if not rest.startswith(b'"'):
             return None
 
         # Find the closing quote of the docstring
         i = 1
         while i < len(rest):
-            if rest[i] == '\\':
+            if rest[i] == _BACKSLASH:
                 i += 2
                 continue
-            if rest[i] == '"':
+            if rest[i] == _QUOTE:
                 doc_text = rest[:i + 1]
                 # Find position in original content
                 doc_offset = content.find(doc_text, form_start)
                 if doc_offset == -1:
                     return None
 
-                start_line = content[:doc_offset].count('\n') + 1
-                end_line = content[:doc_offset + len(doc_text)].count('\n') + 1
+                start_line, end_line = self._get_form_lines(
+                    newlines, doc_offset, doc_offset + len(doc_text)
+                )
 
                 node_id = Node.compute_id(
                     file_path, "clj_docstring",
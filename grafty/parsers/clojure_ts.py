@@ -2,23 +2,34 @@
 clojure_ts.py — Clojure/ClojureScript indexing via Tree-sitter.
 Falls back to balanced-paren scanner if Tree-sitter fails.
 """
-from typing import List, Optional
-from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 try:
     from tree_sitter import Language, Parser
     import tree_sitter_clojure
+    from ._batch import parse_trees, record_source
     HAS_TS_CLOJURE = True
 except ImportError:
     HAS_TS_CLOJURE = False
 
 from ..models import Node
-from .clojure_fallback import ClojureFallbackParser
+from ..utils import read_source_bytes, read_source_with_stat
+from .clojure_fallback import CLJ_KINDS, ClojureFallbackParser
 
 
 class ClojureParser:
     """Index Clojure/ClojureScript files using Tree-sitter or fallback."""
 
+    # Grammar shared by every instance (see _get_language)
+    _language = None
+
+    @classmethod
+    def _get_language(cls):
+        """The Clojure grammar, loaded once per process."""
+        if cls._language is None:
+            cls._language = Language(tree_sitter_clojure.language())
+        return cls._language
+
     def __init__(self, use_fallback: bool = False):
         self.use_fallback = use_fallback or not HAS_TS_CLOJURE
         self.language = None
@@ -26,7 +37,7 @@ class ClojureParser:
 
         if not self.use_fallback:
             try:
-                self.language = Language(tree_sitter_clojure.language())
+                self.language = self._get_language()
                 self.parser = Parser(self.language)
             except Exception as e:
                 print(f"Warning: Clojure Tree-sitter unavailable: {e}")
@@ -36,92 +47,126 @@ class ClojureParser:
 
     def parse_file(self, file_path: str) -> List[Node]:
         """Index a Clojure file and return list of definition nodes."""
-        p = Path(file_path)
-        content = p.read_text(encoding="utf-8")
+        content = read_source_bytes(file_path)
 
         if self.use_fallback:
-            return self.fallback.parse_file(file_path)
+            return self.fallback.parse_file(file_path, content)
 
         try:
-            tree = self.parser.parse(content.encode("utf-8"))
-            nodes = self._extract_defs(tree.root_node, file_path, content)
-            if not nodes:
-                # Fallback if no defs found
-                return self.fallback.parse_file(file_path)
-            return nodes
+            tree = self.parser.parse(content)
         except Exception as e:
-            print(f"Warning: Tree-sitter parse failed for {file_path}; using fallback: {e}")
-            return self.fallback.parse_file(file_path)
-
-    def _extract_defs(
-        self,
-        node,
-        file_path: str,
-        content: str,
+            tree = e
+        return self._nodes_or_fallback(tree, file_path, content)
+
+    def parse_files(
+        self, file_paths: List[str], sources: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[Node]]:
+        """
+        parse_file for several files, reading and parsing them concurrently.
+
+        Only the reads and Tree-sitter parses run on threads (see
+        parse_trees); nodes are built here, on the calling thread. If sources
+        is given it is filled with each file's source (see parse_trees), or
+        the error reading it, and unreadable files are left out of the result;
+        otherwise an unreadable file raises, as in parse_file.
+        """
+        results: Dict[str, List[Node]] = {}
+        if self.use_fallback:
+            # Tree-sitter (and so parse_trees) may be unavailable; scan in turn
+            for file_path in file_paths:
+                try:
+                    source = read_source_with_stat(file_path)
+                except Exception as e:
+                    if sources is None:
+                        raise
+                    sources[file_path] = e
+                    continue
+                if sources is not None:
+                    sources[file_path] = source
+                results[file_path] = self.fallback.parse_file(file_path, source[0])
+            return results
+
+        for file_path, tree, source in parse_trees(self.language, file_paths):
+            if record_source(file_path, tree, source, sources):
+                results[file_path] = self._nodes_or_fallback(tree, file_path, source[0])
+        return results
+
+    def _nodes_or_fallback(
+        self, tree, file_path: str, content: Optional[bytes] = None
     ) -> List[Node]:
-        """Recursively extract all definitions (defn, defmacro, etc.)."""
+        """
+        Definitions in a parsed file (tree, or the exception parsing raised).
+
+        The fallback scanner is used instead, on content if given, if parsing
+        failed or found no definitions.
+        """
+        error = tree if isinstance(tree, Exception) else None
+        if error is None:
+            try:
+                nodes = self._extract_defs(tree.root_node, file_path)
+                if nodes:
+                    return nodes
+            except Exception as e:
+                error = e
+        if error is not None:
+            print(f"Warning: Tree-sitter parse failed for {file_path}; using fallback: {error}")
+        # Parse failed or found no defs
+        return self.fallback.parse_file(file_path, content)
+
+    def _extract_defs(self, root, file_path: str) -> List[Node]:
+        """
+        Extract the top-level definitions (ns, defn, defmacro, etc.).
+
+        Like the fallback scanner, only top-level forms are considered, so
+        function bodies are never walked. Each form's leading symbol is read
+        once and decides which form parser, if any, handles it.
+        """
         nodes: List[Node] = []
 
-        # Look for lists that start with def/defn/etc.
-        if node.type == "list_lit":
-            def_node = self._parse_def_form(node, file_path, content)
-            if def_node:
+        for form in root.children:
+            if form.type != "list_lit":
+                continue
+
+            # The form's elements, without its parens and metadata
+            values = form.children_by_field_name("value")
+            if len(values) < 2 or values[0].type != "sym_lit" or values[1].type != "sym_lit":
+                continue
+
+            # Compared as bytes; decoded only for forms that become nodes
+            keyword = values[0].text
+            if keyword == b"ns":
+                nodes.append(self._parse_ns_form(form, values[1], file_path))
+            elif keyword.startswith(b"def"):
+                def_node = self._parse_def_form(form, keyword, values[1], file_path)
                 nodes.append(def_node)
-                doc = self._extract_clj_docstring(node, file_path, def_node)
-                if doc:
-                    nodes.append(doc)
-
-        # Also look for namespaces
-        if node.type == "list_lit":
-            ns_node = self._parse_ns_form(node, file_path, content)
-            if ns_node:
-                nodes.append(ns_node)
-
-        # Recurse
-        for child in node.children:
-            nodes.extend(self._extract_defs(child, file_path, content))
+                # (defn name "docstring" [args] body)
+                if len(values) >= 3 and values[2].type == "str_lit":
+                    nodes.append(self._extract_clj_docstring(values[2], file_path, def_node))
 
         return nodes
 
+    @staticmethod
+    def _symbol_name(sym) -> str:
+        """A symbol's name, without any metadata attached to it (^:private name)."""
+        name = sym.child_by_field_name("name") or sym
+        return name.text.decode("utf-8")
+
     def _parse_def_form(
         self,
         node,
+        keyword: bytes,
+        name_child,
         file_path: str,
-        content: str,
-    ) -> Optional[Node]:
-        """Parse a def/defn/defmacro form."""
-        # First child should be a symbol
-        if not node.children:
-            return None
-
-        first_child = node.children[0]
-        if first_child.type != "sym_lit":
-            return None
-
-        keyword = first_child.text.decode("utf-8")
-        if not keyword.startswith("def"):
-            return None
-
-        # Second child is the name
-        if len(node.children) < 2:
-            return None
-
-        name_child = node.children[1]
-        if name_child.type != "sym_lit":
-            return None
-
-        name = name_child.text.decode("utf-8")
+    ) -> Node:
+        """Build the node for a def/defn/defmacro form named by name_child."""
+        name = self._symbol_name(name_child)
         start_line = node.start_point[0] + 1
         end_line = node.end_point[0] + 1
 
-        kind = {
-            "defn": "clj_defn",
-            "defmacro": "clj_defmacro",
-            "defmulti": "clj_defmulti",
-            "defmethod": "clj_defmethod",
-        }.get(keyword, "clj_def")
+        kind = CLJ_KINDS.get(keyword, "clj_def")
+        signature = keyword.decode("utf-8")
 
-        node_id = Node.compute_id(file_path, kind, name, start_line, keyword)
+        node_id = Node.compute_id(file_path, kind, name, start_line, signature)
 
         return Node(
             id=node_id,
@@ -132,36 +177,17 @@ class ClojureParser:
             end_line=end_line,
             start_byte=node.start_byte,
             end_byte=node.end_byte,
-            signature=keyword,
+            signature=signature,
         )
 
     def _parse_ns_form(
         self,
         node,
+        ns_child,
         file_path: str,
-        content: str,
-    ) -> Optional[Node]:
-        """Parse a namespace form."""
-        if not node.children:
-            return None
-
-        first_child = node.children[0]
-        if first_child.type != "sym_lit":
-            return None
-
-        keyword = first_child.text.decode("utf-8")
-        if keyword != "ns":
-            return None
-
-        # Second child is the namespace name
-        if len(node.children) < 2:
-            return None
-
-        ns_child = node.children[1]
-        if ns_child.type != "sym_lit":
-            return None
-
-        ns_name = ns_child.text.decode("utf-8")
+    ) -> Node:
+        """Build the node for a namespace form naming ns_child."""
+        ns_name = self._symbol_name(ns_child)
         start_line = node.start_point[0] + 1
         end_line = node.end_point[0] + 1
 
@@ -181,33 +207,27 @@ class ClojureParser:
 
     def _extract_clj_docstring(
         self,
-        ts_node,
+        doc,
         file_path: str,
         parent_node: Node,
-    ) -> Optional[Node]:
-        """Extract Clojure docstring (string after name in def forms)."""
-        # (defn name "docstring" [args] body)
-        # children[0]=defn, children[1]=name, children[2]=docstring?
-        children = [c for c in ts_node.children if c.type not in ("(", ")", " ")]
-        if len(children) >= 3 and children[2].type == "str_lit":
-            doc = children[2]
-            start_line = doc.start_point[0] + 1
-            end_line = doc.end_point[0] + 1
-            name = parent_node.name
-            node_id = Node.compute_id(
-                file_path, "clj_docstring", name, start_line,
-                parent_node.qualname,
-            )
-            return Node(
-                id=node_id,
-                kind="clj_docstring",
-                name=name,
-                path=file_path,
-                start_line=start_line,
-                end_line=end_line,
-                start_byte=doc.start_byte,
-                end_byte=doc.end_byte,
-                parent_id=parent_node.id,
-                qualname=parent_node.qualname,
-            )
-        return None
+    ) -> Node:
+        """Build the docstring node for a def form's string literal after its name."""
+        start_line = doc.start_point[0] + 1
+        end_line = doc.end_point[0] + 1
+        name = parent_node.name
+        node_id = Node.compute_id(
+            file_path, "clj_docstring", name, start_line,
+            parent_node.qualname,
+        )
+        return Node(
+            id=node_id,
+            kind="clj_docstring",
+            name=name,
+            path=file_path,
+            start_line=start_line,
+            end_line=end_line,
+            start_byte=doc.start_byte,
+            end_byte=doc.end_byte,
+            parent_id=parent_node.id,
+            qualname=parent_node.qualname,
+        )
@@ -2,8 +2,7 @@
 csharp_ts.py — C# indexing via Tree-sitter.
 Supports: .cs files
 """
-from typing import List, Optional
-from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 try:
     from tree_sitter import Language, Parser
@@ -14,24 +13,61 @@ except ImportError as e:
     ) from e
 
 from ..models import Node
+from ..utils import read_source_bytes
+from ._batch import parse_trees, record_source
 
 
 class CSharpParser:
     """Index C# files using Tree-sitter."""
 
+    # Grammar shared by every instance (see _get_language)
+    _language: Optional[Language] = None
+
+    @classmethod
+    def _get_language(cls) -> Language:
+        """The C# grammar, loaded once per process."""
+        if cls._language is None:
+            cls._language = Language(tree_sitter_c_sharp.language())
+        return cls._language
+
     def __init__(self) -> None:
-        self.language = Language(tree_sitter_c_sharp.language())
+        self.language = self._get_language()
         self.parser = Parser(self.language)
 
     def parse_file(self, file_path: str) -> List[Node]:
-        p = Path(file_path)
-        content = p.read_text(encoding="utf-8")
+        content = read_source_bytes(file_path)
         try:
-            tree = self.parser.parse(content.encode("utf-8"))
+            tree = self.parser.parse(content)
         except Exception as e:
             print(f"Warning: Failed to parse {file_path}: {e}")
             return []
+        return self._extract_nodes(tree, file_path)
+
+    def parse_files(
+        self, file_paths: List[str], sources: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, List[Node]]:
+        """
+        parse_file for several files, reading and parsing them concurrently.
+
+        Only the reads and Tree-sitter parses run on threads (see
+        parse_trees); nodes are built here, on the calling thread. If sources
+        is given it is filled with each file's source (see parse_trees), or
+        the error reading it, and unreadable files are left out of the result;
+        otherwise an unreadable file raises, as in parse_file.
+        """
+        results: Dict[str, List[Node]] = {}
+        for file_path, tree, source in parse_trees(self.language, file_paths):
+            if not record_source(file_path, tree, source, sources):
+                continue
+            if isinstance(tree, Exception):
+                print(f"Warning: Failed to parse {file_path}: {tree}")
+                results[file_path] = []
+            else:
+                results[file_path] = self._extract_nodes(tree, file_path)
+        return results
 
+    def _extract_nodes(self, tree, file_path: str) -> List[Node]:
+        """Declaration and doc comment nodes from a parsed file."""
         nodes: List[Node] = []
         self._walk(tree.root_node, file_path, nodes, None, None)
         return nodes
@@ -39,23 +75,28 @@ class CSharpParser:
     def _walk(
         self, node, file_path: str, nodes: List[Node],
         parent_id: Optional[str], parent_name: Optional[str],
+        doc_comments: Optional[Tuple[Any, Any]] = None,
     ) -> None:
+        """
+        Extract node's declarations into nodes.
+
+        doc_comments is the (first, last) comment of the /// block right
+        before node, if any (see _walk_children).
+        """
         if node.type == "compilation_unit":
-            for child in node.children:
-                self._walk(child, file_path, nodes, None, None)
+            self._walk_children(node, file_path, nodes, None, None)
 
         elif node.type == "namespace_declaration":
             # Recurse into namespace body
-            for child in node.children:
-                if child.type == "declaration_list":
-                    for stmt in child.children:
-                        self._walk(stmt, file_path, nodes, parent_id, parent_name)
+            body = node.child_by_field_name("body")
+            if body is not None:
+                self._walk_children(body, file_path, nodes, parent_id, parent_name)
 
         elif node.type == "class_declaration":
             cls = self._extract_named(node, file_path, "cs_class", parent_id, parent_name)
             if cls:
                 nodes.append(cls)
-                doc = self._extract_doc(node, file_path, cls)
+                doc = self._extract_doc(doc_comments, file_path, cls)
                 if doc:
                     nodes.append(doc)
                 self._walk_body(node, file_path, nodes, cls)
@@ -64,7 +105,7 @@ class CSharpParser:
             iface = self._extract_named(node, file_path, "cs_interface", parent_id, parent_name)
             if iface:
                 nodes.append(iface)
-                doc = self._extract_doc(node, file_path, iface)
+                doc = self._extract_doc(doc_comments, file_path, iface)
                 if doc:
                     nodes.append(doc)
                 self._walk_body(node, file_path, nodes, iface)
@@ -73,7 +114,7 @@ class CSharpParser:
             st = self._extract_named(node, file_path, "cs_struct", parent_id, parent_name)
             if st:
                 nodes.append(st)
-                doc = self._extract_doc(node, file_path, st)
+                doc = self._extract_doc(doc_comments, file_path, st)
                 if doc:
                     nodes.append(doc)
                 self._walk_body(node, file_path, nodes, st)
@@ -82,7 +123,7 @@ class CSharpParser:
             enum = self._extract_named(node, file_path, "cs_enum", parent_id, parent_name)
             if enum:
                 nodes.append(enum)
-                doc = self._extract_doc(node, file_path, enum)
+                doc = self._extract_doc(doc_comments, file_path, enum)
                 if doc:
                     nodes.append(doc)
 
@@ -90,7 +131,7 @@ class CSharpParser:
             method = self._extract_method(node, file_path, parent_id, parent_name)
             if method:
                 nodes.append(method)
-                doc = self._extract_doc(node, file_path, method)
+                doc = self._extract_doc(doc_comments, file_path, method)
                 if doc:
                     nodes.append(doc)
 
@@ -106,18 +147,46 @@ class CSharpParser:
                 nodes.append(prop)
 
     def _walk_body(self, node, file_path, nodes, parent):
-        for child in node.children:
-            if child.type == "declaration_list":
-                for stmt in child.children:
-                    self._walk(stmt, file_path, nodes, parent.id, parent.name)
-                break
+        body = node.child_by_field_name("body")
+        if body is not None and body.type == "declaration_list":
+            self._walk_children(body, file_path, nodes, parent.id, parent.name)
+
+    def _walk_children(self, container, file_path, nodes, parent_id, parent_name):
+        """
+        _walk each child of container, with the /// comments right before it.
+
+        A run of consecutive /// comments documents the next named sibling.
+        The run is tracked while the children are visited in order, so no
+        declaration has to walk back over its preceding siblings.
+        """
+        doc_comments = None  # (first, last) of the current /// run
+        for child in container.children:
+            if not child.is_named:
+                continue  # braces and separators do not break a run
+            if child.type == "comment":
+                # Checked on the raw bytes; only names are decoded
+                if child.text.startswith(b"///"):
+                    doc_comments = (doc_comments[0] if doc_comments else child, child)
+                else:
+                    doc_comments = None
+                continue
+            self._walk(child, file_path, nodes, parent_id, parent_name, doc_comments)
+            doc_comments = None
+
+    @staticmethod
+    def _name_of(node) -> Optional[str]:
+        """
+        A declaration's name, from the grammar's `name` field.
+
+        The field lookup runs in Tree-sitter rather than scanning the
+        children in Python, and cannot mistake a return or property type
+        written as a plain identifier (`Foo Bar()`) for the name.
+        """
+        name = node.child_by_field_name("name")
+        return name.text.decode("utf-8") if name is not None else None
 
     def _extract_named(self, node, file_path, kind, parent_id, parent_name):
-        name = None
-        for child in node.children:
-            if child.type in ("identifier", "type_identifier"):
-                name = child.text.decode("utf-8")
-                break
+        name = self._name_of(node)
         if not name:
             return None
 
@@ -133,21 +202,8 @@ class CSharpParser:
         )
 
     def _extract_method(self, node, file_path, parent_id, parent_name, kind="cs_method"):
-        """Extract method — skip return type, get identifier."""
-        name = None
-        found_type = False
-        for child in node.children:
-            if child.type in ("predefined_type", "type_identifier",
-                              "generic_name", "nullable_type", "array_type",
-                              "void_keyword"):
-                found_type = True
-            elif found_type and child.type == "identifier":
-                name = child.text.decode("utf-8")
-                break
-            elif not found_type and child.type == "identifier":
-                # Could be the name if no explicit return type visible
-                name = child.text.decode("utf-8")
-                break
+        """Extract a method or property (its name follows the return/property type)."""
+        name = self._name_of(node)
         if not name:
             return None
 
@@ -162,22 +218,14 @@ class CSharpParser:
             parent_id=parent_id, qualname=qualname, is_method=True,
         )
 
-    def _extract_doc(self, ts_node, file_path, parent_node):
-        """Extract XML doc comment (///) preceding a declaration."""
-        comments = []
-        prev = ts_node.prev_named_sibling
-        while prev and prev.type == "comment":
-            text = prev.text.decode("utf-8")
-            if text.startswith("///"):
-                comments.insert(0, prev)
-                prev = prev.prev_named_sibling
-            else:
-                break
-        if not comments:
+    def _extract_doc(self, doc_comments, file_path, parent_node):
+        """Build the doc node for an XML doc comment (///) block, if there is one."""
+        if doc_comments is None:
             return None
+        first, last = doc_comments
 
-        start_line = comments[0].start_point[0] + 1
-        end_line = comments[-1].end_point[0] + 1
+        start_line = first.start_point[0] + 1
+        end_line = last.end_point[0] + 1
         node_id = Node.compute_id(
             file_path, "cs_doc", parent_node.name,
             start_line, parent_node.qualname,
@@ -185,7 +233,7 @@ class CSharpParser:
         return Node(
             id=node_id, kind="cs_doc", name=parent_node.name,
             path=file_path, start_line=start_line, end_line=end_line,
-            start_byte=comments[0].start_byte,
-            end_byte=comments[-1].end_byte,
+            start_byte=first.start_byte,
+            end_byte=last.end_byte,
             parent_id=parent_node.id, qualname=parent_node.qualname,
         )
@@ -3,11 +3,18 @@ patch.py — Unified diff generation, validation, and atomic file writes.
 """
 import difflib
 import hashlib
+import mmap
 import os
 import shutil
+import stat
 import tempfile
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Callable, Iterator, List, Optional, Tuple, TypeVar, Union
+
+from .utils import write_all
+
+_T = TypeVar("_T")
 
 
 def compute_hash(content: str) -> str:
@@ -16,12 +23,93 @@ def compute_hash(content: str) -> str:
 
 
 def read_file_with_hash(path: str) -> Tuple[str, str, float]:
-    """Read file and return (content, hash, mtime)."""
-    p = Path(path)
-    content = p.read_text(encoding="utf-8")
-    mtime = p.stat().st_mtime
-    hash_val = compute_hash(content)
-    return content, hash_val, mtime
+    """
+    Read file and return (content, hash, mtime).
+
+    Content is decoded as UTF-8 with universal newlines, like
+    Path.read_text, and hash is compute_hash(content). Regular files are
+    memory-mapped, so the bytes are hashed and decoded straight from the
+    page cache without first being copied into a bytes object.
+    """
+    content, hash_val, st = read_file_with_stat(path)
+    return content, hash_val, st.st_mtime
+
+
+def read_file_with_stat(path: str) -> Tuple[str, str, os.stat_result]:
+    """
+    read_file_with_hash, returning the file's stat (taken from the open file)
+    in place of its mtime, for callers that also need its file_stamp.
+    """
+    (content, hash_val), st = _with_file_data(path, decode_and_hash)
+    return content, hash_val, st
+
+
+def file_stamp(st: os.stat_result) -> Tuple[int, int]:
+    """
+    (st_mtime_ns, st_size) of a stat result.
+
+    Drift checks compare stamps rather than float mtimes, which round away
+    sub-microsecond changes, and include the size, so a rewrite within the
+    same timestamp tick is still caught when it changes the length.
+    """
+    return (st.st_mtime_ns, st.st_size)
+
+
+def hash_file(path: str) -> Tuple[str, float]:
+    """
+    Return (hash, mtime) for a file, as read_file_with_hash would for UTF-8 text.
+
+    For callers that discard the content: the bytes are hashed without
+    being decoded, straight from the mapping unless newlines need
+    translating. (hashlib.file_digest cannot be used, as the hash is of the
+    newline-translated text, not of the raw bytes.) Unlike
+    read_file_with_hash, invalid UTF-8 is not an error: such a file hashes
+    its newline-translated bytes, so files of unknown type (which are never
+    decoded) index without error whatever their encoding.
+    """
+    hash_val, st = _with_file_data(path, _hash_data)
+    return hash_val, st.st_mtime
+
+
+def _with_file_data(path: str, func: Callable[[Any], _T]) -> Tuple[_T, os.stat_result]:
+    """Open path, call func on its bytes (mapped when possible); return (result, stat)."""
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        mm = None
+        if st.st_size > 0 and stat.S_ISREG(st.st_mode):
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass  # e.g. filesystems without mmap support; read instead
+        if mm is None:
+            result = func(f.read())
+        else:
+            with mm:
+                if hasattr(mm, "madvise"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                result = func(mm)
+    return result, st
+
+
+def decode_and_hash(data) -> Tuple[str, str]:
+    """Decode UTF-8 bytes (or a buffer) with universal newlines; return (content, hash)."""
+    if data.find(b"\r") == -1:
+        # No newline translation, so the raw bytes are exactly content's encoding
+        return str(data, "utf-8"), hashlib.sha256(data).hexdigest()
+    content = str(data, "utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    return content, compute_hash(content)
+
+
+def _hash_data(data) -> str:
+    """
+    The hash half of decode_and_hash, without decoding.
+
+    "\r" never occurs inside a multi-byte UTF-8 sequence, so translating
+    newlines in the bytes yields the encoding of the translated text.
+    """
+    if data.find(b"\r") == -1:
+        return hashlib.sha256(data).hexdigest()
+    return hashlib.sha256(bytes(data).replace(b"\r\n", b"\n").replace(b"\r", b"\n")).hexdigest()
 
 
 def normalize_newlines(content: str) -> Tuple[str, str]:
@@ -51,6 +139,20 @@ def generate_unified_diff(
     Generate unified diff between original and modified content.
     Returns diff string (with file headers).
     """
+    return "".join(iter_unified_diff(original, modified, file_path, context_lines))
+
+
+def iter_unified_diff(
+    original: str,
+    modified: str,
+    file_path: str,
+    context_lines: int = 3,
+) -> Iterator[str]:
+    """
+    Yield generate_unified_diff's output in pieces, one per diff line.
+
+    For writing a large diff out without first joining it into one string.
+    """
     orig_lines = original.splitlines(keepends=True)
     mod_lines = modified.splitlines(keepends=True)
 
@@ -62,7 +164,12 @@ def generate_unified_diff(
         lineterm="",
         n=context_lines,
     )
-    return "\n".join(diff) + "\n"
+    empty = True
+    for line in diff:
+        empty = False
+        yield line + "\n"
+    if empty:
+        yield "\n"
 
 
 def apply_patch_to_buffer(content: str, operation: dict) -> str:
@@ -73,7 +180,44 @@ def apply_patch_to_buffer(content: str, operation: dict) -> str:
     Returns modified content.
     """
     lines = content.splitlines(keepends=True)
+    _apply_to_lines(lines, operation)
+    return "".join(lines)
+
+
+def apply_operations(content: str, operations: List[dict]) -> str:
+    """
+    Apply several patch operations to a content buffer in one pass.
+
+    Line numbers in every operation refer to content as given. Operations are
+    applied bottom-up (by start_line, descending), so no edit shifts the lines
+    of another starting below it. At the same start_line, replaces and
+    deletes go before inserts, so the inserted text lands above the edited
+    lines instead of being edited itself; other ties keep their order. The
+    buffer is split and joined once, rather than once per operation as with
+    repeated apply_patch_to_buffer.
+    """
+    if not operations:
+        return content
+    lines = content.splitlines(keepends=True)
+    apply_operations_to_lines(lines, operations)
+    return "".join(lines)
 
+
+def apply_operations_to_lines(lines: List[str], operations: List[dict]) -> None:
+    """
+    apply_operations on a list of lines (newlines kept), in place.
+
+    Each edit is a list slice assignment, which moves line references rather
+    than copying text.
+    """
+    for operation in sorted(
+        operations, key=lambda op: (op["start_line"], op["kind"] != "insert"), reverse=True
+    ):
+        _apply_to_lines(lines, operation)
+
+
+def _apply_to_lines(lines: List[str], operation: dict) -> None:
+    """Apply one patch operation to a list of lines (newlines kept), in place."""
     kind = operation["kind"]
     start_line = operation["start_line"]  # 1-indexed
     end_line = operation["end_line"]  # 1-indexed, inclusive
@@ -83,33 +227,22 @@ def apply_patch_to_buffer(content: str, operation: dict) -> str:
     start_idx = start_line - 1
     end_idx = end_line  # exclusive for slicing
 
+    new_lines: List[str] = []
+    if kind in ("replace", "insert") and text:
+        # Preserve existing newline if text doesn't have one
+        if not text.endswith("\n"):
+            text += "\n"
+        new_lines = text.splitlines(keepends=True)
+
     if kind == "replace":
         # Remove lines [start_idx:end_idx], insert text
-        new_lines = lines[:start_idx]
-        if text:
-            # Preserve existing newline if text doesn't have one
-            if not text.endswith("\n"):
-                text += "\n"
-            new_lines.extend(text.splitlines(keepends=True))
-        new_lines.extend(lines[end_idx:])
-        return "".join(new_lines)
-
+        lines[start_idx:end_idx] = new_lines
     elif kind == "insert":
         # Insert at start_line (before it)
-        new_lines = lines[:start_idx]
-        if text:
-            if not text.endswith("\n"):
-                text += "\n"
-            new_lines.extend(text.splitlines(keepends=True))
-        new_lines.extend(lines[start_idx:])
-        return "".join(new_lines)
-
+        lines[start_idx:start_idx] = new_lines
     elif kind == "delete":
         # Delete lines [start_idx:end_idx]
-        new_lines = lines[:start_idx]
-        new_lines.extend(lines[end_idx:])
-        return "".join(new_lines)
-
+        del lines[start_idx:end_idx]
     else:
         raise ValueError(f"Unknown operation kind: {kind}")
 
@@ -125,39 +258,71 @@ def write_atomic(
     Optionally create .bak backup.
     Restores newline style before writing.
     """
-    p = Path(file_path)
+    write_atomic_many([(file_path, content, newline_mode)], backup=backup)
 
-    # Create backup if requested
-    if backup and p.exists():
-        bak_path = Path(f"{file_path}.bak")
-        shutil.copy2(file_path, bak_path)
 
-    # Restore newline mode and write atomically
-    content = restore_newlines(content, newline_mode)
+def write_atomic_many(
+    files: List[Tuple[str, str, str]],
+    backup: bool = False,
+) -> None:
+    """
+    Atomically write several files: (file_path, content, newline_mode) each.
 
-    with tempfile.NamedTemporaryFile(
-        mode="w",
-        encoding="utf-8",
-        dir=p.parent,
-        delete=False,
-    ) as tmp:
-        tmp.write(content)
-        tmp_path = tmp.name
+    Every temp file is written before any is renamed into place, so a
+    failed write (e.g. a full disk) leaves all targets untouched, and the
+    renames run back to back. Optionally create .bak backups first.
+    """
+    if backup:
+        for file_path, _, _ in files:
+            if Path(file_path).exists():
+                shutil.copy2(file_path, f"{file_path}.bak")
 
-    # Atomic rename
-    os.replace(tmp_path, file_path)
+    tmp_paths: List[str] = []
+    try:
+        for file_path, content, newline_mode in files:
+            # Restore newline mode and write to a temp file beside the target,
+            # encoded once and handed to the kernel with raw os.write calls
+            data = restore_newlines(content, newline_mode).encode("utf-8")
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".")
+            tmp_paths.append(tmp_path)
+            try:
+                write_all(fd, data)
+            finally:
+                os.close(fd)
+    except BaseException:
+        for tmp_path in tmp_paths:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        raise
+
+    # Atomic renames
+    for (file_path, _, _), tmp_path in zip(files, tmp_paths):
+        os.replace(tmp_path, file_path)
 
 
 def validate_drift(
     file_path: str,
     expected_hash: str,
     force: bool = False,
+    expected_stamp: Optional[Tuple[int, int]] = None,
 ) -> None:
     """
     Check if file content has drifted (hash mismatch).
     Raises ValueError if drift detected and force=False.
+
+    If expected_stamp (see file_stamp) is given, taken when the hashed
+    content was read, and the file still has that stamp, it is taken as
+    unchanged without re-reading and re-hashing it.
     """
-    _, actual_hash, _ = read_file_with_hash(file_path)
+    if expected_stamp is not None:
+        try:
+            if file_stamp(os.stat(file_path)) == expected_stamp:
+                return
+        except OSError:
+            pass  # reported by the read below
+    actual_hash, _ = hash_file(file_path)
     if actual_hash != expected_hash and not force:
         raise ValueError(
             f"File {file_path} has drifted (hash mismatch). "
@@ -165,13 +330,52 @@ def validate_drift(
         )
 
 
-def git_apply_check(patch_content: str, repo_root: str = ".") -> Tuple[bool, str]:
+@dataclass
+class ParsedPatch:
+    """A unified diff with its summary counts, parsed once (see parse_patch)."""
+
+    text: str
+    files: List[str]
+    added: int
+    removed: int
+
+
+def parse_patch(patch_content: str) -> ParsedPatch:
+    """Scan a unified diff once for its target files and added/removed line counts."""
+    files: List[str] = []
+    added = 0
+    removed = 0
+
+    for line in patch_content.strip().split("\n"):
+        first = line[:1]
+        if first == "+":
+            if line.startswith("+++"):
+                files.append(line.split("\t")[0][6:])  # strip "b/"
+            else:
+                added += 1
+        elif first == "-" and not line.startswith("---"):
+            removed += 1
+
+    return ParsedPatch(
+        text=patch_content,
+        files=list(dict.fromkeys(files)),
+        added=added,
+        removed=removed,
+    )
+
+
+def git_apply_check(
+    patch: Union[str, ParsedPatch], repo_root: str = "."
+) -> Tuple[bool, str]:
     """
     Validate patch applicability via 'git apply --check'.
+    Accepts the patch text or a ParsedPatch.
     Returns (success, output_or_error).
     """
     import subprocess
 
+    patch_content = patch.text if isinstance(patch, ParsedPatch) else patch
+
     git_dir = Path(repo_root) / ".git"
     if not git_dir.exists():
         # Not a git repo; skip check
@@ -191,19 +395,10 @@ def git_apply_check(patch_content: str, repo_root: str = ".") -> Tuple[bool, str
         return True, "git not found (skipping validation)"
 
 
-def format_patch_summary(patch_content: str) -> str:
-    """Extract summary info from unified diff (file count, line counts, etc.)."""
-    lines = patch_content.strip().split("\n")
-    files = set()
-    added = 0
-    removed = 0
-
-    for line in lines:
-        if line.startswith("+++"):
-            files.add(line.split("\t")[0][6:])  # strip "b/"
-        if line.startswith("+") and not line.startswith("+++"):
-            added += 1
-        if line.startswith("-") and not line.startswith("---"):
-            removed += 1
-
-    return f"{len(files)} file(s), +{added} -{removed} lines"
+def format_patch_summary(patch: Union[str, ParsedPatch]) -> str:
+    """
+    Extract summary info from unified diff (file count, line counts, etc.).
+    Accepts the patch text or a ParsedPatch, which is not re-scanned.
+    """
+    parsed = patch if isinstance(patch, ParsedPatch) else parse_patch(patch)
+    return f"{len(parsed.files)} file(s), +{parsed.added} -{parsed.removed} lines"
@@ -1,14 +1,42 @@
 """
 selectors.py — Selector resolution and tree navigation.
 """
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
+from collections import OrderedDict
 from dataclasses import dataclass
 from difflib import SequenceMatcher
 from pathlib import Path
 import fnmatch
+import bisect
+import functools
+import heapq
+import os
+import re
 
 from .models import Node, SelectorResult, FileIndex
 
+# "file:42" or "file:42-50" with exactly one colon; \d accepts the same digits int() does
+_LINE_SELECTOR_RE = re.compile(r"([^:]*):(\d+)(?:-(\d+))?")
+
+# Resolutions remembered across Resolver instances over unchanged indices
+RESOLVE_CACHE_SIZE = 512
+_resolve_cache: "OrderedDict[Tuple[int, str, str], SelectorResult]" = OrderedDict()
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_glob(pattern: str) -> Callable[[str], Optional[re.Match]]:
+    """Compile a glob pattern once into a regex match function (case-sensitive)."""
+    return re.compile(fnmatch.translate(pattern)).match
+
+
+def _literal_prefix(pattern: str) -> Optional[str]:
+    """Return "foo" for a glob of the form "foo*" without other wildcards, else None."""
+    if pattern.endswith("*"):
+        prefix = pattern.rstrip("*")
+        if prefix and not any(c in prefix for c in "*?["):
+            return prefix
+    return None
+
 
 @dataclass
 class LineNumberSelector:
@@ -29,37 +57,14 @@ class LineNumberSelector:
         Returns None if not a valid line selector.
         Must have exactly ONE colon to distinguish from path:kind:name format.
         """
-        if selector.count(":") != 1:
-            # Only accept selectors with exactly one colon
+        m = _LINE_SELECTOR_RE.fullmatch(selector)
+        if m is None:
             return None
-
-        file_path, line_spec = selector.rsplit(":", 1)
-
-        # line_spec must be digits or digits-digits
-        if "-" in line_spec:
-            parts = line_spec.split("-", 1)
-            if len(parts) != 2:
-                return None
-            if not (parts[0].isdigit() and parts[1].isdigit()):
-                return None
-            try:
-                start_line = int(parts[0])
-                end_line = int(parts[1])
-                if start_line <= 0 or end_line <= 0:
-                    return None
-                return LineNumberSelector(file_path, start_line, end_line)
-            except ValueError:
-                return None
-        else:
-            if not line_spec.isdigit():
-                return None
-            try:
-                line_num = int(line_spec)
-                if line_num <= 0:
-                    return None
-                return LineNumberSelector(file_path, line_num, line_num)
-            except ValueError:
-                return None
+        start_line = int(m.group(2))
+        end_line = int(m.group(3)) if m.group(3) is not None else start_line
+        if start_line <= 0 or end_line <= 0:
+            return None
+        return LineNumberSelector(m.group(1), start_line, end_line)
 
 
 class Resolver:
@@ -73,21 +78,47 @@ class Resolver:
     def _build_lookup(self) -> None:
         """Build global node lookup."""
         self.nodes_by_id: Dict[str, Node] = {}
-        self.nodes_by_kind: Dict[str, List[Node]] = {}
         self.nodes_by_path: Dict[str, List[Node]] = {}
+        self._nodes_by_kind: Optional[Dict[str, List[Node]]] = None
 
         for file_index in self.indices.values():
             for node in file_index.nodes:
                 self.nodes_by_id[node.id] = node
 
-                if node.kind not in self.nodes_by_kind:
-                    self.nodes_by_kind[node.kind] = []
-                self.nodes_by_kind[node.kind].append(node)
-
                 if node.path not in self.nodes_by_path:
                     self.nodes_by_path[node.path] = []
                 self.nodes_by_path[node.path].append(node)
 
+        self._sorted_nodes: Optional[List[Node]] = None
+        self._sorted_names: Optional[List[str]] = None
+        self._normalized_paths: Dict[str, str] = {}
+        # Same files with the same content resolve identically
+        self._fingerprint = hash(
+            tuple((path, fi.content_hash) for path, fi in self.indices.items())
+        )
+
+    @property
+    def nodes_by_kind(self) -> Dict[str, List[Node]]:
+        """Nodes grouped by kind, built on first access."""
+        if self._nodes_by_kind is None:
+            self._nodes_by_kind = {}
+            for file_index in self.indices.values():
+                for node in file_index.nodes:
+                    self._nodes_by_kind.setdefault(node.kind, []).append(node)
+        return self._nodes_by_kind
+
+    def _nodes_with_prefix(self, prefix: str) -> List[Node]:
+        """All nodes whose name starts with prefix, sorted by name, via bisection."""
+        if self._sorted_nodes is None:
+            # Stable sort, so equal names keep nodes_by_id order like a full scan would
+            self._sorted_nodes = sorted(self.nodes_by_id.values(), key=lambda n: n.name)
+            self._sorted_names = [node.name for node in self._sorted_nodes]
+        start = bisect.bisect_left(self._sorted_names, prefix)
+        end = start
+        while end < len(self._sorted_names) and self._sorted_names[end].startswith(prefix):
+            end += 1
+        return self._sorted_nodes[start:end]
+
     def resolve(self, selector: str) -> SelectorResult:
         """
         Resolve a selector string to a node.
@@ -97,11 +128,28 @@ class Resolver:
           3. "path/to/file.py:42-50" or "path/to/file.py:42" — by line numbers (Phase 3)
           4. "my_func" — fuzzy name search
         Returns SelectorResult with exact_match or candidates.
+        Results are memoized per selector for indices with the same files
+        and content hashes, including across Resolver instances; each call
+        gets its own copy, so callers may modify it.
         """
         # Try by ID
         if selector in self.nodes_by_id:
             return SelectorResult(exact_match=self.nodes_by_id[selector])
 
+        # Relative selector paths depend on the working directory
+        key = (self._fingerprint, os.getcwd(), selector)
+        result = _resolve_cache.get(key)
+        if result is None:
+            result = self._resolve_uncached(selector)
+            _resolve_cache[key] = result
+            if len(_resolve_cache) > RESOLVE_CACHE_SIZE:
+                _resolve_cache.popitem(last=False)
+        else:
+            _resolve_cache.move_to_end(key)
+        return SelectorResult(result.exact_match, list(result.candidates), result.error)
+
+    def _resolve_uncached(self, selector: str) -> SelectorResult:
+        """resolve() without the memo or the ID lookup."""
         # Try line number format (Phase 3)
         line_sel = LineNumberSelector.parse(selector)
         if line_sel is not None:
@@ -125,7 +173,11 @@ class Resolver:
 
     def _normalize_path(self, path: str) -> str:
         """Normalize a path by expanding tilde and resolving to absolute."""
-        return str(Path(path).expanduser().resolve())
+        normalized = self._normalized_paths.get(path)
+        if normalized is None:
+            normalized = str(Path(path).expanduser().resolve())
+            self._normalized_paths[path] = normalized
+        return normalized
 
     def _resolve_by_path_kind_name(
         self,
@@ -178,20 +230,25 @@ class Resolver:
 
     def _matches_nested_path(self, node: Node, name_parts: list) -> bool:
         """Check if node matches a nested path like ['Wardrobe', 'JSON parse']."""
-        # Build path from node upwards to root
+        # Collect names from the node upwards (leaf first); only the last
+        # len(name_parts) levels of the path can affect the result
+        depth = len(name_parts)
+        if depth == 0:
+            return False
         path = [node.name]
         current = node
 
-        while current.parent_id:
+        while current.parent_id and len(path) < depth:
             parent = self.nodes_by_id.get(current.parent_id)
             if parent:
-                path.insert(0, parent.name)
+                path.append(parent.name)
                 current = parent
             else:
                 break
 
         # Check if path ends with name_parts
-        return path[-len(name_parts):] == name_parts
+        path.reverse()
+        return path == name_parts
 
     def _resolve_by_line_numbers(
         self,
@@ -203,20 +260,16 @@ class Resolver:
         # Find nodes that overlap with the specified line range
         candidates = []
 
-        # Try exact match first
-        for node in self.nodes_by_path.get(file_path, []):
-            # Check if node overlaps with or is contained in the line range
-            if node.start_line >= start_line and node.end_line <= end_line:
-                candidates.append(node)
+        # Try exact match first (nodes contained in the line range)
+        if file_path in self.indices:
+            candidates = self.indices[file_path].nodes_within_lines(start_line, end_line)
 
         # If no match, try with normalized paths (tilde expansion)
         if not candidates:
             normalized_path = self._normalize_path(file_path)
-            for indexed_path, nodes in self.nodes_by_path.items():
+            for indexed_path, file_index in self.indices.items():
                 if self._normalize_path(indexed_path) == normalized_path:
-                    for node in nodes:
-                        if node.start_line >= start_line and node.end_line <= end_line:
-                            candidates.append(node)
+                    candidates.extend(file_index.nodes_within_lines(start_line, end_line))
 
         if len(candidates) == 1:
             return SelectorResult(exact_match=candidates[0])
@@ -252,6 +305,11 @@ class Resolver:
         candidates = []
         scores = []
 
+        # The selector is the second sequence, so its index is built once;
+        # names shared by several nodes are scored once
+        matcher = SequenceMatcher(None, "", name)
+        ratios: Dict[str, float] = {}
+
         for node in self.nodes_by_id.values():
             # Match by name
             if node.name == name:
@@ -259,7 +317,15 @@ class Resolver:
                 scores.append(1.0)
             else:
                 # Fuzzy score
-                ratio = SequenceMatcher(None, node.name, name).ratio()
+                ratio = ratios.get(node.name)
+                if ratio is None:
+                    matcher.set_seq1(node.name)
+                    # Both quick ratios are upper bounds of ratio()
+                    if matcher.real_quick_ratio() <= 0.6 or matcher.quick_ratio() <= 0.6:
+                        ratio = 0.0
+                    else:
+                        ratio = matcher.ratio()
+                    ratios[node.name] = ratio
                 if ratio > 0.6:
                     candidates.append(node)
                     scores.append(ratio)
@@ -290,63 +356,100 @@ class Resolver:
             return result.exact_match
         return None
 
-    def query_nodes_by_pattern(self, pattern: str) -> List[Node]:
+    def query_nodes_by_pattern(
+        self, pattern: str, limit: Optional[int] = None, kind: Optional[str] = None
+    ) -> List[Node]:
         """
         Query nodes by glob pattern (Phase 3.3).
         Supports wildcards: *validate*, test_*, *_test, etc.
 
-        Returns list of matching nodes sorted by name.
+        Returns list of matching nodes sorted by name. If limit is given,
+        only the first `limit` nodes of that order are returned. If kind is
+        given, only nodes of exactly that kind are considered.
         """
-        matches = []
-        for node in self.nodes_by_id.values():
-            if fnmatch.fnmatch(node.name, pattern):
-                matches.append(node)
+        prefix = _literal_prefix(pattern)
+        if prefix is not None:
+            # Plain prefix globs (test_*) are answered from the sorted names
+            matches = self._nodes_with_prefix(prefix)
+            if kind is not None:
+                matches = [node for node in matches if node.kind == kind]
+            return matches[:limit] if limit is not None else matches
+
+        return self.query_nodes_by_compiled(_compile_glob(pattern), kind=kind, limit=limit)
+
+    def query_nodes_by_compiled(
+        self,
+        name_match: Callable[[str], Optional[re.Match]],
+        kind: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Node]:
+        """
+        Query nodes whose name satisfies an already compiled glob matcher.
+
+        name_match is a match function as returned by _compile_glob. If kind
+        is given, only nodes of exactly that kind are considered. Results are
+        ordered and limited as in query_nodes_by_pattern.
+        """
+        if kind is None:
+            matches = [node for node in self.nodes_by_id.values() if name_match(node.name)]
+        else:
+            matches = [
+                node for node in self.nodes_by_id.values()
+                if node.kind == kind and name_match(node.name)
+            ]
+
+        if limit is not None:
+            # Same as sorted(...)[:limit] without sorting every match
+            return heapq.nsmallest(limit, matches, key=lambda n: n.name)
 
         # Sort by name for consistent results
         matches.sort(key=lambda n: n.name)
         return matches
 
-    def query_nodes_by_path_glob(self, selector: str) -> List[Node]:
+    def query_nodes_by_path_glob(
+        self, selector: str, limit: Optional[int] = None
+    ) -> List[Node]:
         """
         Query nodes by path glob pattern (Phase 3.3).
         Format: "src/:py_function:*validate*"
         Supports file path globs and node name patterns.
 
-        Returns list of matching nodes.
+        Returns list of matching nodes, stopping after `limit` matches if given.
         """
         # Parse selector: path:kind:pattern or path:kind or path
         if ":" not in selector:
             # Just a path glob
             path_pattern = selector
-            return [n for path, nodes in self.nodes_by_path.items()
-                    for n in nodes if fnmatch.fnmatch(path, path_pattern)]
-
-        parts = selector.split(":", 2)
-
-        if len(parts) == 2:
-            # path:kind
-            path_pattern, kind = parts
-            matches = []
-            for path, nodes in self.nodes_by_path.items():
-                if fnmatch.fnmatch(path, path_pattern):
-                    for node in nodes:
-                        if node.kind == kind or fnmatch.fnmatch(node.kind, kind):
-                            matches.append(node)
-            return matches
-
-        elif len(parts) == 3:
-            # path:kind:name_pattern
-            path_pattern, kind, name_pattern = parts
-            matches = []
-            for path, nodes in self.nodes_by_path.items():
-                if fnmatch.fnmatch(path, path_pattern):
-                    for node in nodes:
-                        if (node.kind == kind or fnmatch.fnmatch(node.kind, kind)) and \
-                           fnmatch.fnmatch(node.name, name_pattern):
-                            matches.append(node)
-            return matches
-
-        return []
+            kind = None
+            name_pattern = None
+        else:
+            parts = selector.split(":", 2)
+            if len(parts) == 2:
+                # path:kind
+                path_pattern, kind = parts
+                name_pattern = None
+            else:
+                # path:kind:name_pattern
+                path_pattern, kind, name_pattern = parts
+
+        # Compile each glob once and reuse it for every path/node tested
+        path_match = _compile_glob(path_pattern)
+        kind_match = _compile_glob(kind) if kind is not None else None
+        name_match = _compile_glob(name_pattern) if name_pattern is not None else None
+
+        matches: List[Node] = []
+        for path, nodes in self.nodes_by_path.items():
+            if not path_match(path):
+                continue
+            for node in nodes:
+                if kind_match is not None and not (node.kind == kind or kind_match(node.kind)):
+                    continue
+                if name_match is not None and not name_match(node.name):
+                    continue
+                matches.append(node)
+                if limit is not None and len(matches) >= limit:
+                    return matches
+        return matches
 
     def get_tree_path(self, node: Node) -> List[Node]:
         """Get path from root to node (ancestry chain)."""
@@ -356,11 +459,12 @@ class Resolver:
         while current.parent_id:
             parent = self.nodes_by_id.get(current.parent_id)
             if parent:
-                path.insert(0, parent)
+                path.append(parent)
                 current = parent
             else:
                 break
 
+        path.reverse()
         return path
 
     def get_children(self, node: Node) -> List[Node]:
@@ -1,8 +1,9 @@
 """
 utils.py — Shared utilities for parsing and file handling.
 """
+import os
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 
 
 def compute_line_byte_map(content: str) -> Tuple[List[int], List[int]]:
@@ -64,64 +65,166 @@ def get_line_range(content: str, start_line: int, end_line: int) -> str:
     return "".join(lines[start_idx:end_idx])
 
 
+# File type for each supported extension (as returned by os.path.splitext)
+EXT_TO_FILE_TYPE: Dict[str, str] = {
+    ".py": "python",
+    ".md": "markdown",
+    ".org": "orgmode",
+    ".clj": "clojure",
+    ".cljs": "clojurescript",
+    ".js": "javascript",
+    ".ts": "typescript",
+    ".jsx": "javascript",
+    ".tsx": "typescript",
+    ".go": "go",
+    ".rs": "rust",
+    ".html": "html",
+    ".htm": "html",
+    ".css": "css",
+    ".json": "json",
+    ".sh": "bash",
+    ".bash": "bash",
+    ".java": "java",
+    ".cs": "csharp",
+    ".kt": "kotlin",
+    ".kts": "kotlin",
+    ".swift": "swift",
+}
+
+
 def detect_file_type(path: str) -> Optional[str]:
     """Detect file type from extension."""
-    p = Path(path)
-    ext_to_kind = {
-        ".py": "python",
-        ".md": "markdown",
-        ".org": "orgmode",
-        ".clj": "clojure",
-        ".cljs": "clojurescript",
-        ".js": "javascript",
-        ".ts": "typescript",
-        ".jsx": "javascript",
-        ".tsx": "typescript",
-        ".go": "go",
-        ".rs": "rust",
-        ".html": "html",
-        ".htm": "html",
-        ".css": "css",
-        ".json": "json",
-        ".sh": "bash",
-        ".bash": "bash",
-        ".java": "java",
-        ".cs": "csharp",
-        ".kt": "kotlin",
-        ".kts": "kotlin",
-        ".swift": "swift",
-    }
-    return ext_to_kind.get(p.suffix)
+    return EXT_TO_FILE_TYPE.get(os.path.splitext(path)[1])
+
+
+DEFAULT_EXTENSIONS = [
+    ".py", ".md", ".org", ".clj", ".cljs", ".js", ".jsx",
+    ".ts", ".tsx", ".go", ".rs", ".html", ".htm", ".css",
+    ".json", ".sh", ".bash", ".java",
+    ".cs", ".kt", ".kts", ".swift",
+]
 
 
 def find_files(root: str, extensions: Optional[List[str]] = None) -> List[str]:
     """
     Recursively find files matching extensions.
-    If extensions is None, default to [.py, .md, .org, .clj, .cljs, .js, .ts, .go, .rs, .html, .htm, .css].
+    If extensions is None, default to DEFAULT_EXTENSIONS.
     """
-    if extensions is None:
-        extensions = [
-            ".py", ".md", ".org", ".clj", ".cljs", ".js", ".jsx",
-            ".ts", ".tsx", ".go", ".rs", ".html", ".htm", ".css",
-            ".json", ".sh", ".bash", ".java",
-            ".cs", ".kt", ".kts", ".swift",
-        ]
+    return sorted(path for path, _ in _walk(root, extensions))
+
 
-    root_path = Path(root)
-    files = []
+def find_files_with_stat(
+    root: str, extensions: Optional[List[str]] = None
+) -> List[Tuple[str, Optional[os.stat_result]]]:
+    """
+    Like find_files, but return (path, stat_result) pairs in the same order.
+
+    The stat comes from the directory entry, so callers need no second
+    os.stat per file. It is None if the file vanished during the walk.
+    """
+    found = []
+    for path, entry in _walk(root, extensions):
+        try:
+            st: Optional[os.stat_result] = entry.stat()
+        except OSError:
+            st = None
+        found.append((path, st))
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+def _walk(
+    root: str, extensions: Optional[List[str]] = None
+) -> Iterator[Tuple[str, os.DirEntry]]:
+    """
+    Yield (path, entry) for files under root whose names end with one of extensions.
+
+    Uses os.scandir with an explicit stack of directories, so file-type checks
+    come from the cached directory entry and deep trees cannot hit the
+    recursion limit. Paths have the same shape as Path.rglob output. Like
+    rglob, symlinked directories are not followed and unreadable directories
+    are skipped. Order is unspecified.
+    """
+    suffixes = tuple(DEFAULT_EXTENSIONS if extensions is None else extensions)
+    root_str = str(Path(root))
+    stack = [(root_str, "" if root_str == "." else root_str)]
+
+    while stack:
+        dir_path, prefix = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        for entry in entries:
+            path = os.path.join(prefix, entry.name) if prefix else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((entry.path, path))
+            elif entry.name.endswith(suffixes) and entry.is_file():
+                yield path, entry
+
+
+def write_all(fd: int, data: bytes) -> None:
+    """Write all of data to file descriptor fd."""
+    view = memoryview(data)
+    while view:
+        # Usually a single call; os.write may write less than asked
+        view = view[os.write(fd, view):]
+
+
+def write_bytes_atomic(path: str, data: bytes) -> None:
+    """
+    Write data to path through a temp file and rename, with raw os.write calls.
+
+    Readers never see a partially written file. The file mode follows the
+    umask, as with Path.write_text.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        try:
+            write_all(fd, data)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def read_source_bytes(path: str) -> bytes:
+    """
+    Read a source file as UTF-8 bytes with CRLF and CR translated to LF.
+
+    For valid UTF-8 these are exactly the bytes of
+    Path.read_text(encoding="utf-8").encode("utf-8"), so Tree-sitter sees
+    the same input, without decoding and re-encoding the whole file.
+    Invalid UTF-8 is passed through rather than raising.
+    """
+    return read_source_with_stat(path)[0]
 
-    for ext in extensions:
-        files.extend([str(p) for p in root_path.rglob(f"*{ext}") if p.is_file()])
 
-    return sorted(files)
+def read_source_with_stat(path: str) -> Tuple[bytes, os.stat_result]:
+    """read_source_bytes, with the file's stat (taken from the open file)."""
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        data = f.read()
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return data, st
 
 
 def truncate_text(text: str, max_chars: int = 500, max_lines: int = 20) -> str:
     """Truncate text for preview, respecting line and char limits."""
     lines = text.splitlines()
-    if len(lines) > max_lines:
+    line_count = len(lines)
+    if line_count > max_lines:
         lines = lines[:max_lines]
-        lines.append(f"... ({len(text.splitlines()) - max_lines} more lines)")
+        lines.append(f"... ({line_count - max_lines} more lines)")
 
     text = "\n".join(lines)
     if len(text) > max_chars:
@@ -68,3 +68,36 @@ def test_node_ids_stable(bash_file):
     ids1 = [n.id for n in nodes1]
     ids2 = [n.id for n in nodes2]
     assert ids1 == ids2
+
+
+def test_parse_files_matches_parse_file(bash_file, tmp_path):
+    other = tmp_path / "other.sh"
+    other.write_text("build() {\n    make\n}\n")
+    p = BashParser()
+    paths = [str(bash_file), str(other)]
+
+    results = p.parse_files(paths)
+
+    assert list(results) == paths
+    for path in paths:
+        assert results[path] == p.parse_file(path)
+
+
+def test_parse_files_records_sources(bash_file, tmp_path):
+    missing = str(tmp_path / "missing.sh")
+    p = BashParser()
+    sources = {}
+
+    results = p.parse_files([str(bash_file), missing], sources)
+
+    assert list(results) == [str(bash_file)]
+    data, st = sources[str(bash_file)]
+    assert data == bash_file.read_bytes()
+    assert st.st_size == len(data)
+    assert isinstance(sources[missing], FileNotFoundError)
+    with pytest.raises(FileNotFoundError):
+        p.parse_files([str(bash_file), missing])
+
+
+def test_language_shared_across_instances():
+    assert BashParser().language is BashParser().language
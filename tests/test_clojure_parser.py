@@ -51,3 +51,41 @@ class TestClojureParser:
         for node in nodes:
             assert node.start_line >= 1
             assert node.end_line >= node.start_line
+
+    def test_tree_sitter_finds_top_level_forms(self, tmp_repo):
+        """Tree-sitter reads top-level forms itself, skipping metadata and bodies."""
+        p = tmp_repo / "meta.clj"
+        p.write_text(
+            "(ns my.ns)\n"
+            "\n"
+            "(defn ^:private helper\n"
+            '  "Helps."\n'
+            "  [x]\n"
+            "  (def inner 1))\n"
+            "^:dynamic (def config 1)\n"
+        )
+        parser = ClojureParser(use_fallback=False)
+        parser.fallback = None  # any fallback would fail
+
+        nodes = parser.parse_file(str(p))
+
+        assert [(n.kind, n.name) for n in nodes] == [
+            ("clj_ns", "my.ns"),
+            ("clj_defn", "helper"),
+            ("clj_docstring", "helper"),
+            ("clj_def", "config"),
+        ]
+        assert nodes[1].start_line == 3 and nodes[1].end_line == 6
+
+    def test_parse_files_matches_parse_file(self, clojure_file, tmp_repo):
+        """parse_files gives each file the nodes parse_file would."""
+        other = tmp_repo / "other.clj"
+        other.write_text("(ns other.core)\n\n(def answer 42)\n")
+        parser = ClojureParser()
+        paths = [str(clojure_file), str(other)]
+
+        results = parser.parse_files(paths)
+
+        assert list(results) == paths
+        for path in paths:
+            assert results[path] == parser.parse_file(path)
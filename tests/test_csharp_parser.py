@@ -85,3 +85,32 @@ def test_stable_ids(cs_file):
     ids1 = [n.id for n in p.parse_file(str(cs_file))]
     ids2 = [n.id for n in p.parse_file(str(cs_file))]
     assert ids1 == ids2
+
+
+def test_names_after_identifier_types(tmp_path):
+    f = tmp_path / "Types.cs"
+    f.write_text(
+        "class Shop {\n"
+        "    public Order Place(Item item) { return null; }\n"
+        "    public Customer Owner { get; set; }\n"
+        "}\n"
+    )
+    nodes = CSharpParser().parse_file(str(f))
+    assert [(n.kind, n.qualname) for n in nodes] == [
+        ("cs_class", "Shop"),
+        ("cs_method", "Shop.Place"),
+        ("cs_property", "Shop.Owner"),
+    ]
+
+
+def test_parse_files_matches_parse_file(cs_file, tmp_path):
+    other = tmp_path / "Other.cs"
+    other.write_text("class Other { void Run() {} }\n")
+    p = CSharpParser()
+    paths = [str(cs_file), str(other)]
+
+    results = p.parse_files(paths)
+
+    assert list(results) == paths
+    for path in paths:
+        assert results[path] == p.parse_file(path)
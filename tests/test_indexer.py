@@ -0,0 +1,377 @@
+"""
+test_indexer.py — Tests for directory discovery and indexing.
+"""
+import os
+
+import pytest
+
+from grafty._json import loads
+from grafty.index_cache import FileIndexCache
+from grafty.indexer import Indexer, PARALLEL_THRESHOLD
+from grafty.models import FileIndex
+from grafty.utils import find_files, find_files_with_stat
+
+
+def _write_modules(root, count):
+    """Create `count` small Python modules under root."""
+    for i in range(count):
+        (root / f"mod_{i:03d}.py").write_text(
+            f"def func_{i}():\n"
+            f"    return {i}\n"
+        )
+
+
+class TestIndexDirectory:
+    """Tests for Indexer.index_directory."""
+
+    def test_parallel_matches_sequential(self, tmp_repo):
+        """Parallel indexing returns the same indices, in the same order."""
+        _write_modules(tmp_repo, PARALLEL_THRESHOLD + 4)
+        indexer = Indexer()
+
+        sequential = indexer.index_directory(str(tmp_repo), jobs=1)
+        parallel = indexer.index_directory(str(tmp_repo), jobs=2)
+
+        assert list(parallel) == list(sequential)
+        for path, file_index in sequential.items():
+            assert parallel[path].to_dict() == file_index.to_dict()
+
+    def test_index_files_parallel_matches_sequential(self, tmp_repo):
+        """index_files fans large batches out to the pool, keeping order."""
+        _write_modules(tmp_repo, PARALLEL_THRESHOLD + 4)
+        paths = sorted(str(p) for p in tmp_repo.iterdir())[::-1]
+        indexer = Indexer()
+
+        sequential = indexer.index_files(paths, jobs=1)
+        parallel = indexer.index_files(paths, jobs=2)
+
+        assert list(parallel) == list(sequential) == paths
+        for path, file_index in sequential.items():
+            assert parallel[path].to_dict() == file_index.to_dict()
+
+    def test_small_directory_indexed_sequentially(self, tmp_repo):
+        """Directories below the threshold still index every file."""
+        _write_modules(tmp_repo, 3)
+        indices = Indexer().index_directory(str(tmp_repo), jobs=4)
+
+        assert len(indices) == 3
+        names = sorted(n.name for idx in indices.values() for n in idx.nodes)
+        assert names == ["func_0", "func_1", "func_2"]
+
+    def test_index_paths_batches_files_and_directories(self, tmp_repo):
+        """Mixed file and directory paths are indexed once each, in order."""
+        sub = tmp_repo / "pkg"
+        sub.mkdir()
+        _write_modules(sub, 2)
+        single = tmp_repo / "single.py"
+        single.write_text("def lone():\n    pass\n")
+
+        indices = Indexer().index_paths(
+            [str(single), str(sub), str(sub / "mod_000.py")], jobs=1
+        )
+
+        assert list(indices) == [
+            str(single),
+            str(sub / "mod_000.py"),
+            str(sub / "mod_001.py"),
+        ]
+
+    def test_pool_unavailable_warns_on_stderr(self, tmp_repo, capsys, monkeypatch):
+        """Falling back to sequential indexing keeps stdout clean for --json."""
+        import concurrent.futures
+
+        def unavailable(*args, **kwargs):
+            raise OSError("no semaphores")
+
+        monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", unavailable)
+        _write_modules(tmp_repo, PARALLEL_THRESHOLD + 1)
+
+        indices = Indexer().index_directory(str(tmp_repo), jobs=2)
+
+        assert len(indices) == PARALLEL_THRESHOLD + 1
+        out, err = capsys.readouterr()
+        assert out == ""
+        assert "parallel indexing unavailable" in err
+
+    def test_batchable_misses_parsed_with_parse_files(self, tmp_repo, monkeypatch):
+        """Files whose parser has parse_files are parsed as one batch per type."""
+        from grafty.parsers import BashParser
+
+        for i in range(3):
+            (tmp_repo / f"script_{i}.sh").write_text(f"step_{i}() {{\n  echo {i}\n}}\n")
+        _write_modules(tmp_repo, 1)
+        batches = []
+        real_parse_files = BashParser.parse_files
+        monkeypatch.setattr(
+            BashParser,
+            "parse_files",
+            lambda self, paths, sources=None: (
+                batches.append(paths) or real_parse_files(self, paths, sources)
+            ),
+        )
+
+        indices = Indexer().index_directory(str(tmp_repo), jobs=1)
+
+        scripts = sorted(str(p) for p in tmp_repo.glob("*.sh"))
+        assert batches == [scripts]
+        for path in scripts:
+            expected = [n.to_dict() for n in BashParser().parse_file(path)]
+            assert [n.to_dict() for n in indices[path].nodes] == expected
+        assert [n.name for n in indices[str(tmp_repo / "mod_000.py")].nodes] == ["func_0"]
+
+    def test_batched_files_read_once(self, tmp_repo, monkeypatch):
+        """Batched files are indexed from the bytes and stat the batch read."""
+        import grafty.indexer
+
+        scripts = []
+        for i in range(3):
+            path = tmp_repo / f"script_{i}.sh"
+            path.write_text(f"step_{i}() {{\r\n  echo {i}\r\n}}\r\n")
+            scripts.append(str(path))
+        expected = [Indexer().index_file(path) for path in scripts]
+        monkeypatch.setattr(
+            grafty.indexer,
+            "read_file_with_stat",
+            lambda path: pytest.fail(f"{path} read again"),
+        )
+
+        indices = Indexer().index_files(scripts)
+
+        for path, file_index in zip(scripts, expected):
+            assert indices[path].content_hash == file_index.content_hash
+            assert indices[path].mtime == file_index.mtime
+            assert [n.to_dict() for n in indices[path].nodes] == [
+                n.to_dict() for n in file_index.nodes
+            ]
+
+    def test_batch_read_errors_recorded_per_file(self, tmp_repo, monkeypatch):
+        """A file the batch cannot read is recorded; the rest of its batch is kept."""
+        from grafty.parsers import BashParser
+
+        scripts = []
+        for i in range(3):
+            path = tmp_repo / f"script_{i}.sh"
+            path.write_text(f"step_{i}() {{\n  echo {i}\n}}\n")
+            scripts.append(str(path))
+        missing = str(tmp_repo / "missing.sh")
+        paths = [scripts[0], missing] + scripts[1:]
+        calls = []
+        real_parse_file = BashParser.parse_file
+        monkeypatch.setattr(
+            BashParser,
+            "parse_file",
+            lambda self, path: calls.append(path) or real_parse_file(self, path),
+        )
+
+        indexer = Indexer()
+        indices = indexer.index_files(paths)
+
+        assert list(indices) == scripts
+        assert calls == []
+        assert [path for path, _ in indexer.errors] == [missing]
+
+    def test_batch_parser_failure_recorded_per_file(self, tmp_repo, monkeypatch):
+        """A parser that cannot be built is an error per file, not for index_files."""
+        from grafty.parsers import BashParser
+
+        def broken(self):
+            raise RuntimeError("grammar unavailable")
+
+        monkeypatch.setattr(BashParser, "__init__", broken)
+        scripts = []
+        for i in range(2):
+            path = tmp_repo / f"script_{i}.sh"
+            path.write_text(f"step_{i}() {{\n  echo {i}\n}}\n")
+            scripts.append(str(path))
+        _write_modules(tmp_repo, 1)
+        module = str(tmp_repo / "mod_000.py")
+
+        indexer = Indexer()
+        indices = indexer.index_files(scripts + [module])
+
+        assert list(indices) == [module]
+        assert indexer.errors == [(path, "grammar unavailable") for path in scripts]
+
+    def test_parsers_built_on_first_use(self, python_file):
+        """Only the parsers for file types actually indexed are constructed."""
+        indexer = Indexer()
+        assert indexer.parsers == {}
+
+        indexer.index_file(str(python_file))
+        indexer.index_file(str(python_file))
+
+        assert list(indexer.parsers) == ["python"]
+
+    def test_parser_modules_imported_on_demand(self, python_file):
+        """Importing grafty.parsers leaves unused parser modules unimported."""
+        import subprocess
+        import sys
+
+        code = (
+            "import sys; from grafty.indexer import Indexer; "
+            f"Indexer().index_file({str(python_file)!r}); "
+            "print(sorted(m for m in sys.modules if m.startswith('grafty.parsers.')))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        assert out.strip() == "['grafty.parsers.python_ts']"
+
+    def test_find_files_with_stat_matches_find_files(self, tmp_repo):
+        """The stat walk lists the same files, each with its own stat."""
+        _write_modules(tmp_repo, 2)
+        nested = tmp_repo / "a" / "b"
+        nested.mkdir(parents=True)
+        (nested / "deep.py").write_text("x = 1\n")
+        (tmp_repo / "notes.txt").write_text("skip me\n")
+
+        pairs = find_files_with_stat(str(tmp_repo))
+
+        assert [path for path, _ in pairs] == find_files(str(tmp_repo))
+        for path, st in pairs:
+            assert st.st_size == os.stat(path).st_size
+
+    def test_index_files_reports_unreadable_file(self, tmp_repo, capsys):
+        """Undecodable files are left out and recorded in errors, not printed."""
+        _write_modules(tmp_repo, 2)
+        bad = tmp_repo / "bad.py"
+        bad.write_bytes(b"\xff\xfe def broken\n")
+        paths = [str(tmp_repo / "mod_000.py"), str(bad), str(tmp_repo / "mod_001.py")]
+
+        indexer = Indexer()
+        indices = indexer.index_files(paths)
+
+        assert list(indices) == [paths[0], paths[2]]
+        assert capsys.readouterr().out == ""
+        assert [path for path, _ in indexer.errors] == [str(bad)]
+
+
+class TestIndexCache:
+    """Tests for the on-disk FileIndex cache."""
+
+    def test_cached_index_matches_parse(self, python_file, tmp_path):
+        """A fresh cache instance serves entries written by an earlier one."""
+        path = str(python_file)
+        root = str(tmp_path / "cache")
+        expected = Indexer().index_file(path)
+
+        Indexer(cache=FileIndexCache(root)).index_file(path)
+        cached = Indexer(cache=FileIndexCache(root))
+        cached._parse_file = None  # any reparse would fail
+
+        file_index = cached.index_file(path)
+        assert file_index.to_dict() == expected.to_dict()
+        assert set(file_index.nodes_by_id) == set(expected.nodes_by_id)
+
+    def test_cache_entries_omit_none_fields(self, python_file, tmp_path):
+        """Entries are stored sparse and load back with the None defaults."""
+        cache = FileIndexCache(str(tmp_path / "cache"))
+        expected = Indexer(cache=cache).index_file(str(python_file))
+
+        with open(cache._entry_path(str(python_file)), "rb") as f:
+            stored = loads(f.read())["index"]["nodes"]
+        assert all(None not in node.values() for node in stored)
+        assert FileIndex.from_dict(expected.to_dict(sparse=True)) == expected
+
+    def test_cached_nodes_share_kind_and_path_strings(self, python_file, tmp_path):
+        """Indices loaded from the cache intern node kinds and paths."""
+        root = str(tmp_path / "cache")
+        Indexer(cache=FileIndexCache(root)).index_file(str(python_file))
+
+        nodes = Indexer(cache=FileIndexCache(root)).index_file(str(python_file)).nodes
+        methods = [n for n in nodes if n.kind == "py_method"]
+        assert len(methods) >= 2
+        assert methods[0].kind is methods[1].kind
+        assert all(n.path is nodes[0].path for n in nodes)
+
+    def test_modified_file_is_reparsed(self, tmp_repo, tmp_path):
+        """Changing a file's size or mtime invalidates its entry."""
+        path = tmp_repo / "mod.py"
+        path.write_text("def old():\n    pass\n")
+        root = str(tmp_path / "cache")
+        Indexer(cache=FileIndexCache(root)).index_file(str(path))
+
+        path.write_text("def renamed():\n    pass\n")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        file_index = Indexer(cache=FileIndexCache(root)).index_file(str(path))
+        assert [n.name for n in file_index.nodes] == ["renamed"]
+
+    def test_upgraded_packages_invalidate_entries(self, python_file, tmp_path, monkeypatch):
+        """Entries and manifests written by other grafty/grammar versions are misses."""
+        import grafty.index_cache
+
+        root = str(tmp_path / "cache")
+        Indexer(cache=FileIndexCache(root)).index_directory(str(python_file.parent), jobs=1)
+
+        monkeypatch.setattr(grafty.index_cache, "_code_version", lambda: "upgraded")
+        cache = FileIndexCache(root)
+        cache.load_manifest(str(python_file.parent))
+        assert cache._manifest == {}
+        assert cache.get(str(python_file), os.stat(python_file)) is None
+
+    def test_lookup_id_without_parsing(self, python_file, tmp_path):
+        """Node ids recorded by an earlier run resolve from the cache alone."""
+        root = str(tmp_path / "cache")
+        node = Indexer(cache=FileIndexCache(root)).index_file(str(python_file)).nodes[0]
+
+        found = FileIndexCache(root).lookup_id(node.id)
+        assert found is not None
+        assert found.to_dict() == node.to_dict()
+
+        python_file.write_text("x = 1\n")
+        assert FileIndexCache(root).lookup_id(node.id) is None
+
+    def test_id_map_shards_prune_replaced_and_deleted_files(self, tmp_repo, tmp_path):
+        """A flush rewrites only the shards its ids fall in, dropping stale ids there."""
+        _write_modules(tmp_repo, 2)
+        keep, gone = str(tmp_repo / "mod_000.py"), str(tmp_repo / "mod_001.py")
+        cache = FileIndexCache(str(tmp_path / "cache"))
+        old_ids = [n.id for n in Indexer(cache=cache).index_file(keep).nodes]
+        Indexer(cache=cache).index_file(gone)
+
+        os.unlink(gone)
+        with open(keep, "a") as f:
+            f.write("\ndef added():\n    pass\n")
+        new_ids = [n.id for n in Indexer(cache=cache).index_file(keep).nodes]
+
+        for node_id in new_ids:
+            ids = cache._load_ids(node_id[:2])
+            assert ids[node_id] == keep
+            assert gone not in ids.values()
+            assert all(other.startswith(node_id[:2]) for other in ids)
+        stale = [i for i in old_ids if i not in new_ids and i[:2] in {n[:2] for n in new_ids}]
+        assert all(i not in cache._load_ids(i[:2]) for i in stale)
+
+    def test_memory_only_cache_writes_nothing(self, python_file, tmp_path):
+        """A non-persistent cache reuses indices in-process only."""
+        root = tmp_path / "cache"
+        indexer = Indexer(cache=FileIndexCache(str(root), persistent=False))
+
+        first = indexer.index_file(str(python_file))
+        assert indexer.index_file(str(python_file)) is first
+        assert not root.exists()
+
+    def test_directory_manifest_tracks_changes(self, tmp_repo, tmp_path):
+        """Warm directory runs reuse the manifest; deleted files drop out."""
+        _write_modules(tmp_repo, 3)
+        root = str(tmp_path / "cache")
+        Indexer(cache=FileIndexCache(root)).index_directory(str(tmp_repo), jobs=1)
+
+        (tmp_repo / "mod_001.py").unlink()
+        for entry in os.listdir(FileIndexCache(root).cache_dir):
+            if not entry.startswith("dir-"):
+                os.unlink(os.path.join(FileIndexCache(root).cache_dir, entry))
+
+        warm = Indexer(cache=FileIndexCache(root))
+        warm._parse_file = None  # served from the manifest alone
+        indices = warm.index_directory(str(tmp_repo), jobs=1)
+        assert sorted(n.name for idx in indices.values() for n in idx.nodes) == [
+            "func_0",
+            "func_2",
+        ]
+
+        cache = FileIndexCache(root)
+        cache.load_manifest(str(tmp_repo))
+        assert len(cache._manifest) == 2
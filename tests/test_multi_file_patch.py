@@ -5,6 +5,7 @@ test_multi_file_patch.py — Tests for multi-file atomic patch system (Phase 4.1
 Tests cover loading, validation, dry-run, atomic application, and edge cases.
 """
 import json
+import os
 
 import pytest
 
@@ -168,6 +169,20 @@ src/config.py:insert:5:5:enabled=True"""
 
         assert len(ps.mutations) == 2
 
+    def test_load_from_json_accepts_bytes(self):
+        """UTF-8 bytes load the same mutations as the decoded string."""
+        json_content = json.dumps([{
+            "file_path": "src/é.py",
+            "operation_kind": "delete",
+            "start_line": 3,
+            "end_line": 4,
+        }])
+        from_str, from_bytes = PatchSet(), PatchSet()
+        from_str.load_from_json(json_content)
+        from_bytes.load_from_json(json_content.encode("utf-8"))
+
+        assert from_bytes.mutations == from_str.mutations
+
     def test_load_from_json_invalid_json_raises(self):
         """Test that invalid JSON raises ValueError."""
         ps = PatchSet()
@@ -236,6 +251,51 @@ class TestPatchSetValidation:
         assert not result.success
         assert any("start_line" in err and "file size" in err for err in result.errors)
 
+    def test_validate_all_counts_lines_like_splitlines(self, tmp_repo):
+        """Line bounds follow str.splitlines, with or without a final newline."""
+        (tmp_repo / "plain.py").write_text("a\nb\nc")
+        (tmp_repo / "feed.py").write_text("a\fb\nc\n")
+
+        ps = PatchSet()
+        ps.add_mutation("plain.py", "delete", 3, 3)
+        ps.add_mutation("feed.py", "delete", 3, 3)
+        assert ps.validate_all(str(tmp_repo)).success
+
+        ps.add_mutation("plain.py", "delete", 4, 4)
+        assert not ps.validate_all(str(tmp_repo)).success
+
+    def test_validate_all_summarizes_excess_errors(self, tmp_repo):
+        """Past MAX_REPORTED_ERRORS, errors are counted rather than listed."""
+        from grafty.multi_file_patch import MAX_REPORTED_ERRORS
+
+        (tmp_repo / "test.py").write_text("line1\n")
+        ps = PatchSet()
+        for _ in range(MAX_REPORTED_ERRORS + 5):
+            ps.add_mutation("test.py", "replace", 7, 7, "x")
+
+        result = ps.validate_all(str(tmp_repo))
+
+        assert result.message == f"Validation failed: {MAX_REPORTED_ERRORS + 5} error(s)"
+        assert len(result.errors) == MAX_REPORTED_ERRORS + 1
+        assert result.errors[-1] == "... and 5 more error(s)"
+
+    def test_validate_all_counts_excess_errors_across_files(self, tmp_repo):
+        """The cap spans files, so missing files past it are only counted."""
+        from grafty.multi_file_patch import MAX_REPORTED_ERRORS
+
+        (tmp_repo / "test.py").write_text("line1\n")
+        ps = PatchSet()
+        for _ in range(MAX_REPORTED_ERRORS - 1):
+            ps.add_mutation("test.py", "replace", 7, 7, "x")
+        for name in ("gone1.py", "gone2.py", "gone3.py"):
+            ps.add_mutation(name, "delete", 1, 1)
+
+        result = ps.validate_all(str(tmp_repo))
+
+        assert result.message == f"Validation failed: {MAX_REPORTED_ERRORS + 2} error(s)"
+        assert result.errors[MAX_REPORTED_ERRORS - 1] == "File not found: gone1.py"
+        assert result.errors[-1] == "... and 2 more error(s)"
+
     def test_validate_all_detects_overlapping_mutations(self, tmp_repo):
         """Test validation warns about overlapping mutations."""
         test_file = tmp_repo / "test.py"
@@ -250,6 +310,38 @@ class TestPatchSetValidation:
         # Should warn about overlap but not fail validation if individual mutations are OK
         assert len(result.warnings) > 0 or result.success
 
+    def test_validate_all_detects_non_adjacent_overlap(self, tmp_repo):
+        """A long mutation overlaps every later one it covers, not just the next."""
+        (tmp_repo / "test.py").write_text("".join(f"line{i}\n" for i in range(1, 11)))
+
+        ps = PatchSet()
+        ps.add_mutation("test.py", "replace", 1, 8, "big")
+        ps.add_mutation("test.py", "replace", 2, 3, "a")
+        ps.add_mutation("test.py", "replace", 5, 6, "b")
+        ps.add_mutation("test.py", "replace", 9, 10, "c")
+
+        warnings = ps.validate_all(str(tmp_repo)).warnings
+        assert warnings == [
+            "test.py: Mutations 0 and 1 overlap (1-8 vs 2-3)",
+            "test.py: Mutations 0 and 2 overlap (1-8 vs 5-6)",
+        ]
+
+    def test_validate_all_keeps_adjacent_overlaps_under_long_span(self, tmp_repo):
+        """Neighbours inside a long span still overlap each other, as reported before."""
+        (tmp_repo / "test.py").write_text("".join(f"line{i}\n" for i in range(1, 11)))
+
+        ps = PatchSet()
+        ps.add_mutation("test.py", "replace", 1, 10, "big")
+        ps.add_mutation("test.py", "replace", 2, 3, "a")
+        ps.add_mutation("test.py", "replace", 3, 4, "b")
+
+        warnings = ps.validate_all(str(tmp_repo)).warnings
+        assert warnings == [
+            "test.py: Mutations 0 and 1 overlap (1-10 vs 2-3)",
+            "test.py: Mutations 1 and 2 overlap (2-3 vs 3-4)",
+            "test.py: Mutations 0 and 2 overlap (1-10 vs 3-4)",
+        ]
+
 
 class TestPatchSetDryRun:
     """Tests for dry-run diff generation."""
@@ -350,6 +442,66 @@ class TestPatchSetApplyAtomic:
         assert "x1" in file1.read_text()
         assert "x2" in file2.read_text()
 
+    def test_apply_atomic_reads_each_file_once(self, tmp_repo, monkeypatch):
+        """Validation's read of each file is reused for applying."""
+        import grafty.multi_file_patch as mfp
+
+        (tmp_repo / "file1.py").write_text("a1\na2\n")
+        (tmp_repo / "file2.py").write_text("b1\nb2\n")
+        reads = []
+        real_read = mfp.read_file_with_stat
+        monkeypatch.setattr(mfp, "read_file_with_stat", lambda p: reads.append(p) or real_read(p))
+
+        ps = PatchSet()
+        ps.add_mutation("file1.py", "replace", 1, 1, "x1")
+        ps.add_mutation("file1.py", "delete", 2, 2)
+        ps.add_mutation("file2.py", "insert", 1, 1, "x2")
+
+        assert ps.apply_atomic(str(tmp_repo)).success
+        assert len(reads) == 2
+        assert (tmp_repo / "file1.py").read_text() == "x1\n"
+
+    def test_validation_reused_until_files_change(self, tmp_repo, monkeypatch):
+        """validate -> dry-run shares one read; apply reads again and revalidates edits."""
+        import grafty.multi_file_patch as mfp
+
+        test_file = tmp_repo / "test.py"
+        test_file.write_text("a1\na2\n")
+        reads = []
+        real_read = mfp.read_file_with_stat
+        monkeypatch.setattr(mfp, "read_file_with_stat", lambda p: reads.append(p) or real_read(p))
+
+        ps = PatchSet()
+        ps.add_mutation("test.py", "replace", 1, 1, "x1")
+        assert ps.validate_all(str(tmp_repo)).success
+        assert ps.generate_diffs(str(tmp_repo)).success
+        assert len(reads) == 1
+
+        test_file.write_text("b1\nb2\nb3\n")
+        st = os.stat(test_file)
+        os.utime(test_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert ps.apply_atomic(str(tmp_repo)).success
+        assert len(reads) == 3  # the re-read before writing, then revalidation
+        assert test_file.read_text() == "x1\nb2\nb3\n"
+
+        ps.generate_diffs(str(tmp_repo))
+        assert len(reads) == 4
+
+    def test_apply_rereads_edit_with_unchanged_stamp(self, tmp_repo):
+        """An edit that keeps mtime and size is applied to, not overwritten."""
+        test_file = tmp_repo / "test.py"
+        test_file.write_text("a1\na2\n")
+        st = os.stat(test_file)
+
+        ps = PatchSet()
+        ps.add_mutation("test.py", "replace", 1, 1, "x1")
+        assert ps.generate_diffs(str(tmp_repo)).success
+
+        test_file.write_text("b1\nb2\n")
+        os.utime(test_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert ps.apply_atomic(str(tmp_repo)).success
+        assert test_file.read_text() == "x1\nb2\n"
+
     def test_apply_atomic_with_backup(self, tmp_repo):
         """Test that --backup creates .bak files."""
         test_file = tmp_repo / "test.py"
@@ -1,12 +1,28 @@
 """
 test_patch.py — Tests for patch generation and application.
 """
+import hashlib
+import os
+
+import pytest
 
 from grafty.patch import (
+    apply_operations,
     apply_patch_to_buffer,
+    compute_hash,
+    file_stamp,
+    format_patch_summary,
     generate_unified_diff,
+    hash_file,
+    iter_unified_diff,
     normalize_newlines,
+    parse_patch,
+    read_file_with_hash,
+    read_file_with_stat,
+    validate_drift,
+    write_atomic_many,
 )
+from grafty.utils import write_bytes_atomic
 
 
 class TestPatchOperations:
@@ -64,6 +80,29 @@ class TestPatchOperations:
         assert "line 2" not in result
         assert "line 3" in result
 
+    def test_apply_operations_uses_original_line_numbers(self):
+        """Batched operations all address the buffer as given."""
+        content = "a\nb\nc\nd\n"
+        operations = [
+            {"kind": "delete", "start_line": 1, "end_line": 1, "text": ""},
+            {"kind": "replace", "start_line": 3, "end_line": 3, "text": "C1\nC2"},
+            {"kind": "insert", "start_line": 2, "end_line": 2, "text": "x"},
+        ]
+
+        assert apply_operations(content, operations) == "x\nb\nC1\nC2\nd\n"
+
+    def test_apply_operations_insert_and_edit_same_line(self):
+        """An insert at an edited line lands above the edit, in either queue order."""
+        content = "a\nb\nc\n"
+        insert = {"kind": "insert", "start_line": 2, "end_line": 2, "text": "X"}
+        replace = {"kind": "replace", "start_line": 2, "end_line": 2, "text": "Y"}
+        delete = {"kind": "delete", "start_line": 2, "end_line": 2, "text": ""}
+
+        assert apply_operations(content, [insert, replace]) == "a\nX\nY\nc\n"
+        assert apply_operations(content, [replace, insert]) == "a\nX\nY\nc\n"
+        assert apply_operations(content, [insert, delete]) == "a\nX\nc\n"
+        assert apply_operations(content, [delete, insert]) == "a\nX\nc\n"
+
     def test_unified_diff_generation(self):
         """Test unified diff generation."""
         original = "line 1\nline 2\nline 3\n"
@@ -75,6 +114,38 @@ class TestPatchOperations:
         assert "+modified line 2" in diff
         assert "-line 2" in diff
 
+    def test_iter_unified_diff_matches_generated_diff(self):
+        """The streamed pieces join to exactly the generated diff."""
+        original = "a\nb\nc"
+        for modified in (original, "a\nB\nc\nd\n", ""):
+            pieces = list(iter_unified_diff(original, modified, "f.txt"))
+            assert "".join(pieces) == generate_unified_diff(original, modified, "f.txt")
+
+    def test_validate_drift_trusts_unchanged_stamp(self, tmp_path):
+        """An unchanged stamp skips the re-hash; a changed one re-checks content."""
+        path = tmp_path / "f.txt"
+        path.write_text("old\n")
+        _, hash_val, st = read_file_with_stat(str(path))
+        stamp = file_stamp(st)
+
+        validate_drift(str(path), "stale-hash", expected_stamp=stamp)
+
+        path.write_text("new\n")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+        with pytest.raises(ValueError, match="drifted"):
+            validate_drift(str(path), hash_val, expected_stamp=stamp)
+
+    def test_validate_drift_stamp_catches_same_tick_rewrite(self, tmp_path):
+        """A rewrite that keeps the mtime but changes the size is still re-hashed."""
+        path = tmp_path / "f.txt"
+        path.write_text("old\n")
+        _, hash_val, st = read_file_with_stat(str(path))
+
+        path.write_text("newer\n")
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        with pytest.raises(ValueError, match="drifted"):
+            validate_drift(str(path), hash_val, expected_stamp=file_stamp(st))
+
     def test_normalize_newlines_crlf(self):
         """Test CRLF normalization."""
         content = "line 1\r\nline 2\r\nline 3\r\n"
@@ -91,3 +162,70 @@ class TestPatchOperations:
 
         assert mode == "lf"
         assert normalized == content
+
+    def test_parse_patch_summary(self):
+        """A parsed patch gives the same summary as the raw text."""
+        diff = (
+            "--- a/one.py\n+++ b/one.py\n@@ -1,2 +1,2 @@\n-old\n+new\n+extra\n"
+            "--- a/two.py\n+++ b/two.py\n@@ -1 +1 @@\n-x\n"
+        )
+        parsed = parse_patch(diff)
+
+        assert parsed.files == ["one.py", "two.py"]
+        assert format_patch_summary(parsed) == "2 file(s), +2 -2 lines"
+        assert format_patch_summary(diff) == format_patch_summary(parsed)
+
+    def test_write_bytes_atomic_replaces_file(self, tmp_path):
+        """Atomic byte writes replace the target and leave no temp file."""
+        target = tmp_path / "out.patch"
+        target.write_text("old contents that are longer\n")
+
+        write_bytes_atomic(str(target), "--- a/é\n".encode("utf-8"))
+
+        assert target.read_bytes() == "--- a/é\n".encode("utf-8")
+        assert os.listdir(tmp_path) == ["out.patch"]
+
+    def test_write_atomic_many_writes_nothing_on_failure(self, tmp_path):
+        """A failed temp write leaves every target and no temp files behind."""
+        first = tmp_path / "a.txt"
+        first.write_text("old\n")
+        missing_dir = tmp_path / "gone" / "b.txt"
+
+        with pytest.raises(OSError):
+            write_atomic_many(
+                [(str(first), "new\n", "lf"), (str(missing_dir), "x\n", "lf")]
+            )
+
+        assert first.read_text() == "old\n"
+        assert os.listdir(tmp_path) == ["a.txt"]
+
+        write_atomic_many([(str(first), "new\n", "crlf")])
+        assert first.read_bytes() == b"new\r\n"
+
+    def test_read_file_with_hash_matches_text_mode(self, tmp_path):
+        """Mapped reads translate newlines and hash exactly like read_text."""
+        for name, data in [
+            ("empty.txt", b""),
+            ("lf.txt", "a\nb é\n".encode("utf-8")),
+            ("mixed.txt", b"a\r\nb\rc\n\r"),
+        ]:
+            path = tmp_path / name
+            path.write_bytes(data)
+            content, hash_val, mtime = read_file_with_hash(str(path))
+
+            assert content == path.read_text(encoding="utf-8")
+            assert hash_val == compute_hash(content)
+            assert mtime == path.stat().st_mtime
+            assert hash_file(str(path)) == (hash_val, mtime)
+
+    def test_hash_file_accepts_invalid_utf8(self, tmp_path):
+        """hash_file hashes undecodable bytes that read_file_with_hash rejects."""
+        path = tmp_path / "blob.bin"
+        for data in (b"\xff\xfe\n", b"\xff\r\n\xfe\r"):
+            path.write_bytes(data)
+            with pytest.raises(UnicodeDecodeError):
+                read_file_with_hash(str(path))
+
+            hash_val, _ = hash_file(str(path))
+            translated = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+            assert hash_val == hashlib.sha256(translated).hexdigest()
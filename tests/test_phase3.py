@@ -3,7 +3,7 @@ test_phase3.py — Tests for Phase 3 features (line editing, improved errors, qu
 """
 from pathlib import Path
 from grafty.indexer import Indexer
-from grafty.selectors import Resolver, LineNumberSelector
+from grafty.selectors import Resolver, LineNumberSelector, _compile_glob
 from grafty.editor import Editor
 
 
@@ -73,6 +73,65 @@ class TestLineNumberEditing:
         if original_line_5:
             assert original_line_5 not in result or "# Replaced line" in result
 
+    def test_editor_reuses_kept_source(self, tmp_repo, python_file, monkeypatch):
+        """An index with source lines spares Editor a re-read until the file changes."""
+        import os
+        import grafty.editor
+
+        file_index = Indexer().index_file(str(python_file), keep_source=True)
+        expected = python_file.read_text()
+
+        reads = []
+        real_read = grafty.editor.read_file_with_stat
+        monkeypatch.setattr(
+            grafty.editor, "read_file_with_stat", lambda p: reads.append(p) or real_read(p)
+        )
+
+        assert Editor(file_index).current_content == expected
+        assert reads == []
+
+        st = os.stat(python_file)
+        os.utime(python_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        assert Editor(file_index).current_content == expected
+        assert reads == [str(python_file)]
+
+    def test_editor_rereads_same_mtime_rewrite(self, tmp_repo, python_file):
+        """A rewrite that keeps the mtime but not the size is not served stale."""
+        import os
+
+        file_index = Indexer().index_file(str(python_file), keep_source=True)
+        st = os.stat(python_file)
+        python_file.write_text("x = 1\n")
+        os.utime(python_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        editor = Editor(file_index)
+        assert editor.current_content == "x = 1\n"
+        editor.write()  # the drift check passes against the content just read
+
+    def test_editor_edits_after_reading_content(self, tmp_repo, python_file):
+        """Reading current_content between edits leaves the base lines intact."""
+        file_index = Indexer().index_file(str(python_file))
+        editor = Editor(file_index)
+        lines = editor.current_content.splitlines(keepends=True)
+
+        editor.insert(text="# top", line=1)
+        assert editor.current_content == "# top\n" + "".join(lines)
+
+        editor.insert(text="# second", line=2)
+        assert editor.current_content == "# top\n" + lines[0] + "# second\n" + "".join(lines[1:])
+
+        editor.reset()
+        assert editor.current_content == "".join(lines)
+
+    def test_editor_reads_crlf_file_as_text_mode(self, tmp_repo):
+        """CRLF files are normalized once, while being read and hashed."""
+        path = tmp_repo / "crlf.py"
+        path.write_bytes(b"def f():\r\n    pass\r\n")
+        editor = Editor(Indexer().index_file(str(path)))
+
+        assert editor.current_content == path.read_text() == "def f():\n    pass\n"
+        assert editor.newline_mode == "lf"
+
     def test_replace_by_line_number_range(self, tmp_repo, python_file):
         """Test replacing a line range by line numbers."""
         indexer = Indexer()
@@ -108,6 +167,29 @@ class TestLineNumberEditing:
         parsed = LineNumberSelector.parse(selector)
         assert parsed is not None
 
+    def test_nodes_within_lines_matches_scan(self, tmp_repo, python_file):
+        """Column-based containment queries agree with a linear scan."""
+        file_index = Indexer().index_file(str(python_file))
+
+        for start, end in [(1, 100), (3, 16), (6, 8), (18, 20), (30, 40)]:
+            expected = [
+                n for n in file_index.nodes if n.start_line >= start and n.end_line <= end
+            ]
+            assert file_index.nodes_within_lines(start, end) == expected
+
+    def test_line_selector_indexes_only_named_file(self, tmp_repo, python_file):
+        """A path:start-end selector never walks the rest of the repository."""
+        from grafty.cli import _resolve_selector_minimal
+
+        (tmp_repo / "other.py").write_text("def elsewhere():\n    pass\n")
+
+        indices, result = _resolve_selector_minimal(
+            f"{python_file}:18-20", str(tmp_repo)
+        )
+
+        assert len(indices) == 1
+        assert {n.name for n in result.candidates} == {"top_level_function"}
+
 
 class TestImprovedErrorMessages:
     """Tests for improved error messages feature (3.2)."""
@@ -419,6 +501,54 @@ def VALIDATE_INPUT():
         assert len(results) == 0
         assert isinstance(results, list)
 
+    def test_query_nodes_by_compiled_with_kind(self, tmp_repo, python_file):
+        """A precompiled glob with a kind filter matches the unfiltered query."""
+        indices = Indexer().index_directory(str(tmp_repo))
+        resolver = Resolver(indices)
+
+        expected = [n for n in resolver.query_nodes_by_pattern("*") if n.kind == "py_function"]
+        results = resolver.query_nodes_by_compiled(_compile_glob("*"), kind="py_function")
+
+        assert results == expected
+        assert resolver.query_nodes_by_compiled(
+            _compile_glob("*"), kind="py_function", limit=1
+        ) == expected[:1]
+
+    def test_prefix_pattern_matches_full_scan(self, tmp_repo, python_file):
+        """Prefix globs answered by bisection agree with the regex scan."""
+        indices = Indexer().index_directory(str(tmp_repo))
+        resolver = Resolver(indices)
+
+        for pattern in ("validate_*", "M*", "zzz*", "_*"):
+            scanned = resolver.query_nodes_by_compiled(_compile_glob(pattern))
+            assert resolver.query_nodes_by_pattern(pattern) == scanned
+            assert resolver.query_nodes_by_pattern(pattern, limit=1) == scanned[:1]
+
+    def test_resolve_memoized_across_resolvers(self, tmp_repo, python_file):
+        """Resolvers over unchanged indices share resolutions."""
+        indices = Indexer().index_directory(str(tmp_repo))
+        selector = f"{python_file}:py_function:top_level_function"
+
+        first = Resolver(indices).resolve(selector)
+        second_resolver = Resolver(dict(indices))
+        second_resolver._resolve_uncached = None  # must be served from the memo
+        second = second_resolver.resolve(selector)
+
+        assert first.is_resolved()
+        assert second == first
+
+    def test_memoized_result_is_a_copy(self, tmp_repo, python_file):
+        """Modifying a returned result leaves later resolutions intact."""
+        indices = Indexer().index_directory(str(tmp_repo))
+        resolver = Resolver(indices)
+
+        first = resolver.resolve("method")
+        assert first.candidates
+        expected = list(first.candidates)
+        first.candidates.clear()
+
+        assert resolver.resolve("method").candidates == expected
+
 
 class TestPhase3Integration:
     """Integration tests for Phase 3 features."""